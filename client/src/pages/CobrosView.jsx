@@ -2,10 +2,14 @@ import { useState, useEffect } from 'react';
 
 import { fetchWithAuth } from '../utils/api';
 
+const PAGE_SIZE = 50;
+
 export default function CobrosView() {
     const [data, setData] = useState(null);
     const [loading, setLoading] = useState(false);
     const [expandedGroup, setExpandedGroup] = useState(null);
+    const [groupItems, setGroupItems] = useState({});
+    const [sortBy, setSortBy] = useState('prima');
 
     useEffect(() => {
         loadData();
@@ -26,11 +30,41 @@ export default function CobrosView() {
         }
     };
 
+    const loadItems = async (responsable, page = 1, sort = sortBy) => {
+        try {
+            const params = new URLSearchParams({ page, page_size: PAGE_SIZE, sort });
+            const res = await fetchWithAuth(`/api/cobros/pending/${encodeURIComponent(responsable)}?${params}`);
+            const json = await res.json();
+            if (json.success) {
+                setGroupItems(prev => ({
+                    ...prev,
+                    [responsable]: {
+                        items: page === 1 ? json.data : [...(prev[responsable]?.items || []), ...json.data],
+                        pagination: json.pagination
+                    }
+                }));
+            }
+        } catch (error) {
+            console.error('Error loading collection items:', error);
+        }
+    };
+
     const toggleGroup = (responsable) => {
         if (expandedGroup === responsable) {
             setExpandedGroup(null);
         } else {
             setExpandedGroup(responsable);
+            if (!groupItems[responsable]) {
+                loadItems(responsable);
+            }
+        }
+    };
+
+    const changeSort = (sort) => {
+        setSortBy(sort);
+        setGroupItems({});
+        if (expandedGroup) {
+            loadItems(expandedGroup, 1, sort);
         }
     };
 
@@ -56,6 +90,14 @@ export default function CobrosView() {
                     </p>
                 </div>
                 <div className="flex items-center gap-4">
+                    <select
+                        value={sortBy}
+                        onChange={(e) => changeSort(e.target.value)}
+                        className="bg-white px-3 py-2 rounded-xl shadow-sm border border-slate-200 text-sm text-slate-600"
+                    >
+                        <option value="prima">Mayor prima primero</option>
+                        <option value="age">Más antiguas primero</option>
+                    </select>
                     <div className="bg-white px-4 py-2 rounded-xl shadow-sm border border-slate-200 text-right">
                         <span className="block text-xs text-slate-400 font-bold uppercase">Total por Recaudar</span>
                         <span className="text-2xl font-extrabold text-slate-800">
@@ -108,7 +150,7 @@ export default function CobrosView() {
                                         </tr>
                                     </thead>
                                     <tbody className="divide-y divide-slate-100">
-                                        {group.items.map((item, idx) => (
+                                        {(groupItems[group.responsable]?.items || []).map((item, idx) => (
                                             <tr key={idx} className="hover:bg-slate-50 transition-colors">
                                                 <td className="px-4 py-3 font-medium text-slate-800">
                                                     <div>#{item.NUMERO_POLIZA || item.CONSECUTIVO}</div>
@@ -119,7 +161,7 @@ export default function CobrosView() {
                                                 <td className="px-4 py-3 text-xs">{item.FECHA?.split(' ')[0]}</td>
                                                 <td className="px-4 py-3 text-right">
                                                     <span className={`px-2 py-0.5 rounded-full text-[10px] font-bold ${item.dias_mora > 30 ? 'bg-red-100 text-red-700' : (item.dias_mora > 15 ? 'bg-amber-100 text-amber-700' : 'bg-slate-100 text-slate-600')}`}>
-                                                        {item.dias_mora} días
+                                                        {item.dias_mora ?? '-'} días
                                                     </span>
                                                 </td>
                                                 <td className="px-4 py-3 text-right font-bold text-slate-800">
@@ -140,6 +182,19 @@ export default function CobrosView() {
                                         ))}
                                     </tbody>
                                 </table>
+                                {!groupItems[group.responsable] && (
+                                    <div className="p-4 text-center text-sm text-slate-400">Cargando pólizas...</div>
+                                )}
+                                {groupItems[group.responsable] && groupItems[group.responsable].pagination.page < groupItems[group.responsable].pagination.total_pages && (
+                                    <div className="p-4 text-center">
+                                        <button
+                                            onClick={() => loadItems(group.responsable, groupItems[group.responsable].pagination.page + 1)}
+                                            className="text-sm font-bold text-bolivar-green hover:underline"
+                                        >
+                                            Cargar más ({groupItems[group.responsable].items.length} de {groupItems[group.responsable].pagination.total})
+                                        </button>
+                                    </div>
+                                )}
                             </div>
                         )}
                     </div>
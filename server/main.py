@@ -6,18 +6,23 @@ from services.google_sync_service import run_sync
 from services.auth import LoginRequest, verify_google_token
 from services.consecutivos_api_client import get_operation_mode
 from services.background_tasks import periodic_update_recent_estados
+from services import data_versions
+from services.response_cache import cached_json_response, response_cache
+from services.http_cache import conditional, METADATA_CACHE_CONTROL
+from services.fast_json import FastJSONResponse
+from services.compression import CompressionMiddleware
+from services.columnar import get_negocios_columns_by_month, FORMATS
+from services.projection import parse_fields, project, fields_key
 from dependencies import get_current_user
 from pydantic import BaseModel
 import threading
 import asyncio
 import os
-import json
-from datetime import datetime
 
 # Routers
-from routers import dashboard, sheets_api
+from routers import dashboard, sheets_api, search, policies, query, export, reports
 
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
 
 # Configure CORS
 origins = [
@@ -39,11 +44,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Cache", "Content-Disposition"],
 )
 
+# gzip / brotli para respuestas grandes
+app.add_middleware(CompressionMiddleware)
+
 # Include Routers
 app.include_router(dashboard.router)
 app.include_router(sheets_api.router)
+app.include_router(search.router)
+app.include_router(policies.router)
+app.include_router(query.router)
+app.include_router(export.router)
+app.include_router(reports.router)
 
 # --- Startup & Health ---
 
@@ -105,6 +119,11 @@ def health_check():
     mode = "Real" if has_read_credentials() else "Simulation"
     return {"status": "ok", "mode": mode}
 
+@app.get("/api/health/cache", dependencies=[Depends(get_current_user)])
+def cache_stats():
+    """Contadores del caché de respuestas (hits, misses, bytes, desalojos)."""
+    return {"success": True, "response_cache": response_cache.stats()}
+
 @app.post("/api/admin/sync-google")
 async def trigger_google_sync():
     success = run_sync()
@@ -124,41 +143,9 @@ def login(request: LoginRequest):
 # --- REMAINING LEGACY MODULES (To be refactored in Phase 2) ---
 
 # ==================== RENEWALS DATA MANAGEMENT ====================
-_renewals_cache = {'data': None, 'loaded': False, 'timestamp': None}
-
-def load_renewals_data():
-    global _renewals_cache
-    if _renewals_cache['loaded']: return _renewals_cache['data']
-    
-    try:
-        import pandas as pd
-        import math
-        from datetime import date
-        
-        base_dir = os.path.dirname(__file__)
-        file_path = os.path.join(base_dir, "..", "SEGUIMIENTO CANCELACIONES 2025 (1) (1).xlsx")
-        
-        print(f"[RENEWALS] Reading: {file_path}")
-        df = pd.read_excel(file_path, sheet_name='A&A')
-        data = df.to_dict(orient='records')
-        
-        for record in data:
-            for key, value in record.items():
-                if isinstance(value, float) and math.isnan(value):
-                    record[key] = None
-                elif isinstance(value, (datetime, date)):
-                    record[key] = value.isoformat()
-                elif pd.isna(value):
-                    record[key] = None
-        
-        _renewals_cache['data'] = data
-        _renewals_cache['loaded'] = True
-        return data
-    except Exception as e:
-        print(f"[RENEWALS] Error: {e}")
-        return []
+from services.renewals_service import load_renewals_data, get_renewals_source_version
 
-@app.get("/api/renewals/months", dependencies=[Depends(get_current_user)])
+@app.get("/api/renewals/months", dependencies=[Depends(get_current_user), conditional("renewals-months", stamps=(get_renewals_source_version,), cache_control=METADATA_CACHE_CONTROL)])
 def get_renewals_months():
     try:
         data = load_renewals_data() or []
@@ -166,7 +153,7 @@ def get_renewals_months():
         unique_months = set()
         for record in data:
             mes = record.get('# MES')
-            if mes and not pd.isna(mes): unique_months.add(int(mes))
+            if mes: unique_months.add(int(mes))
         
         month_list = sorted([month_names.get(m, f'MES{m}') for m in unique_months if m in month_names])
         return {"success": True, "data": {"type": "multi_sheet_metadata", "sheets": month_list, "default": month_list[0] if month_list else None}}
@@ -174,7 +161,8 @@ def get_renewals_months():
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/renewals/{month}", dependencies=[Depends(get_current_user)])
-def get_renewals_by_month(month: str):
+def get_renewals_by_month(month: str, fields: str = None,
+                          cache_headers: dict = conditional("renewals", stamps=(get_renewals_source_version,))):
     try:
         data = load_renewals_data() or []
         month_map = {'ENE': 1, 'FEB': 2, 'MAR': 3, 'ABR': 4, 'MAY': 5, 'JUN': 6, 'JUL': 7, 'AGO': 8, 'SEP': 9, 'OCT': 10, 'NOV': 11, 'DIC': 12}
@@ -182,22 +170,35 @@ def get_renewals_by_month(month: str):
         if not month_num: raise HTTPException(status_code=400, detail=f"Mes inválido: {month}")
         
         filtered = [r for r in data if r.get('# MES') == month_num]
-        return {"success": True, "data": filtered, "total": len(filtered), "month": month}
+        return FastJSONResponse({"success": True, "data": project(filtered, parse_fields(fields)), "total": len(filtered), "month": month}, headers=cache_headers)
     except Exception as e:
          raise HTTPException(status_code=500, detail=str(e))
 
 # ==================== POLICY STATE MANAGEMENT ====================
-from services.policy_state_manager import policy_state_manager, PolicyStateRequest
+from services.policy_state_manager import policy_state_manager, PolicyStateRequest, PolicyStatesBulkRequest, MAX_BULK_ITEMS
 
 @app.post("/api/policy-states/save", dependencies=[Depends(get_current_user)])
-async def save_policy_state(request: PolicyStateRequest):
+def save_policy_state(request: PolicyStateRequest):
     try:
         result = policy_state_manager.save_state(request.consecutivo, request.estado, request.usuario)
         return {"success": True, "data": result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/policy-states", dependencies=[Depends(get_current_user)])
+@app.post("/api/policy-states/bulk-save", dependencies=[Depends(get_current_user)])
+def save_policy_states_bulk(request: PolicyStatesBulkRequest):
+    if len(request.items) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Máximo {MAX_BULK_ITEMS} pólizas por solicitud")
+    try:
+        results = policy_state_manager.save_states(
+            [(item.consecutivo, item.estado) for item in request.items], request.usuario
+        )
+        saved = sum(1 for r in results if r["success"])
+        return {"success": True, "saved": saved, "failed": len(results) - saved, "data": results}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/policy-states", dependencies=[Depends(get_current_user), conditional("policy-states", (data_versions.POLICY_STATES,))])
 async def get_all_policy_states():
     return {"success": True, "data": policy_state_manager.get_all_states()}
 
@@ -211,39 +212,25 @@ class ForecastMetasRequest(BaseModel): # Redefining locally if not moved
 # But main.py shouldn't have models if possible.
 # Actually I'm keeping these endpoints here so I need the models here.
 
-FORECAST_METAS_FILE = os.path.join(os.path.dirname(__file__), "data", "forecast_metas.json")
+from services.forecast_metas_service import save_sheet_metas, get_sheet_metas
 
 @app.post("/api/forecast-metas/save", dependencies=[Depends(get_current_user)])
-async def save_forecast_meta_values(request: ForecastMetasRequest):
+def save_forecast_meta_values(request: ForecastMetasRequest):
     try:
-        os.makedirs(os.path.dirname(FORECAST_METAS_FILE), exist_ok=True)
-        # Load existing to merge?
-        all_metas = {}
-        if os.path.exists(FORECAST_METAS_FILE):
-             with open(FORECAST_METAS_FILE, 'r', encoding='utf-8') as f: all_metas = json.load(f)
-        
-        all_metas[request.sheetName] = request.metas
-        
-        with open(FORECAST_METAS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(all_metas, f, ensure_ascii=False, indent=2)
-            
+        save_sheet_metas(request.sheetName, request.metas)
         return {"success": True, "message": "Metas guardadas"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/forecast-metas/{sheet_name}", dependencies=[Depends(get_current_user)])
+@app.get("/api/forecast-metas/{sheet_name}", dependencies=[Depends(get_current_user), conditional("forecast-metas", (data_versions.FORECAST_METAS,))])
 async def get_forecast_meta_values(sheet_name: str):
     try:
-        if os.path.exists(FORECAST_METAS_FILE):
-             with open(FORECAST_METAS_FILE, 'r', encoding='utf-8') as f: 
-                 all_metas = json.load(f)
-                 return {"success": True, "data": all_metas.get(sheet_name, {})}
-        return {"success": True, "data": {}}
+        return {"success": True, "data": get_sheet_metas(sheet_name)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # ==================== CANCELACIONES ====================
-from services.cancelaciones_service import get_cancelaciones_data, update_cancelacion
+from services.cancelaciones_service import get_cancelaciones_data, update_cancelacion, get_cancelaciones_source_version, CANCELACIONES_INPUTS
 
 class UpdateCancelacionRequest(BaseModel): # Redefine
     policy_id: str
@@ -251,9 +238,11 @@ class UpdateCancelacionRequest(BaseModel): # Redefine
     value: str
 
 @app.get("/api/cancelaciones", dependencies=[Depends(get_current_user)])
-def get_cancelaciones():
+def get_cancelaciones(fields: str = None,
+                      cache_headers: dict = conditional("cancelaciones", (CANCELACIONES_INPUTS,), stamps=(get_cancelaciones_source_version,))):
+    """fields=COL1,COL2 limita las columnas retornadas."""
     try:
-        return {"success": True, "data": get_cancelaciones_data()}
+        return FastJSONResponse({"success": True, "data": project(get_cancelaciones_data(), parse_fields(fields))}, headers=cache_headers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -265,7 +254,7 @@ def update_cancelacion_endpoint(request: UpdateCancelacionRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 # ==================== DETALLE VIEW ====================
-@app.get("/api/detalle/years", dependencies=[Depends(get_current_user)])
+@app.get("/api/detalle/years", dependencies=[Depends(get_current_user), conditional("detalle-years", (data_versions.SNAPSHOT,), cache_control=METADATA_CACHE_CONTROL)])
 def get_detalle_years():
     try:
         from services.unified_data_processor import get_negocios_nuevos_years
@@ -275,7 +264,7 @@ def get_detalle_years():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/detalle/months/{year}", dependencies=[Depends(get_current_user)])
+@app.get("/api/detalle/months/{year}", dependencies=[Depends(get_current_user), conditional("detalle-months", (data_versions.SNAPSHOT,), cache_control=METADATA_CACHE_CONTROL)])
 def get_detalle_months(year: str):
     try:
         from services.unified_data_processor import get_negocios_nuevos_months
@@ -285,11 +274,25 @@ def get_detalle_months(year: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/detalle/data/{year}/{month}", dependencies=[Depends(get_current_user)])
-def get_detalle_data_by_month(year: str, month: str):
+def get_detalle_data_by_month(year: str, month: str, format: str = 'rows', fields: str = None,
+                              cache_headers: dict = conditional("detalle-data", (data_versions.SNAPSHOT,))):
+    """
+    format=columns retorna columnas + arreglos (categóricas como diccionario + códigos).
+    fields=COL1,COL2 limita las columnas retornadas.
+    """
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Formato inválido: {format}. Use {', '.join(FORMATS)}")
+    field_list = parse_fields(fields)
     try:
         from services.unified_data_processor import get_negocios_nuevos_by_month
-        negocios = get_negocios_nuevos_by_month(year, month)
-        return {"success": True, "data": negocios}
+        if format == 'columns':
+            builder = lambda: {"success": True, **get_negocios_columns_by_month(year, month, field_list)}
+        else:
+            builder = lambda: {"success": True, "data": project(get_negocios_nuevos_by_month(year, month), field_list)}
+        return cached_json_response(
+            "detalle-data", {"year": year, "month": month, "format": format, "fields": fields_key(field_list)}, (data_versions.SNAPSHOT,),
+            builder, headers=cache_headers
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -301,26 +304,18 @@ def get_detalle_data_by_month(year: str, month: str):
 class ConsecutivosPrimaRequest(BaseModel):
     sheetName: str
     primas: dict
-CONSECUTIVOS_PRIMA_FILE = "server/data/consecutivos_primas.json"
+
+from services.consecutivos_primas_service import save_sheet_primas, get_sheet_primas
 
 @app.post("/api/consecutivos-primas/save", dependencies=[Depends(get_current_user)])
-async def save_consecutivos_prima_values(request: ConsecutivosPrimaRequest):
+def save_consecutivos_prima_values(request: ConsecutivosPrimaRequest):
     try:
-        os.makedirs(os.path.dirname(CONSECUTIVOS_PRIMA_FILE), exist_ok=True)
-        all_primas = {}
-        if os.path.exists(CONSECUTIVOS_PRIMA_FILE):
-            with open(CONSECUTIVOS_PRIMA_FILE, 'r', encoding='utf-8') as f: all_primas = json.load(f)
-        all_primas[request.sheetName] = request.primas
-        with open(CONSECUTIVOS_PRIMA_FILE, 'w', encoding='utf-8') as f: json.dump(all_primas, f)
+        save_sheet_primas(request.sheetName, request.primas)
         return {"success": True}
     except Exception as e: raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/consecutivos-primas/{sheet_name}", dependencies=[Depends(get_current_user)])
+@app.get("/api/consecutivos-primas/{sheet_name}", dependencies=[Depends(get_current_user), conditional("consecutivos-primas", (data_versions.CONSECUTIVOS_PRIMAS,))])
 async def get_consecutivos_prima_values(sheet_name: str):
     try:
-        if os.path.exists(CONSECUTIVOS_PRIMA_FILE):
-             with open(CONSECUTIVOS_PRIMA_FILE, 'r', encoding='utf-8') as f: 
-                 return {"success": True, "data": json.load(f).get(sheet_name, {})}
-        return {"success": True, "data": {}}
+        return {"success": True, "data": get_sheet_primas(sheet_name)}
     except Exception as e: raise HTTPException(status_code=500, detail=str(e))
-
@@ -1,38 +1,41 @@
 from fastapi import APIRouter, Depends, HTTPException
 from dependencies import get_current_user
-from services.unified_data_processor import get_forecast_data, load_unified_cache, get_all_records, clean_currency_value as clean_currency
-from services.policy_state_manager import PolicyStateManager
-from datetime import datetime
-import pandas as pd
-import os
-import json
+from services.unified_data_processor import get_forecast_data, load_unified_cache
+from services.cobros_index import get_cobros_summary, get_cobros_items, mapping_stamp, SORT_KEYS
+from services.aging_index import get_aging_histogram, DEFAULT_BUCKETS
+from services.dashboard_stats import build_dashboard_stats
+from services.response_cache import cached_json_response
+from services.http_cache import conditional, METADATA_CACHE_CONTROL
+from services.fast_json import FastJSONResponse
+from services import data_versions
+from datetime import date
 
 router = APIRouter()
 
+FORECAST_SOURCES = (data_versions.SNAPSHOT, data_versions.FORECAST_METAS)
+STATE_SOURCES = (data_versions.SNAPSHOT, data_versions.POLICY_STATES)
+
+def _today():
+    return date.today().isoformat()
+
 @router.get("/api/forecast-calculated/{year}/{month}", dependencies=[Depends(get_current_user)])
-def get_calculated_forecast(year: int, month: str):
+def get_calculated_forecast(year: int, month: str, cache_headers: dict = conditional("forecast-calculated", FORECAST_SOURCES)):
     """
     Retorna forecast calculado desde cache unificada.
     """
     try:
-        # Usar nueva función unificada
-        data = get_forecast_data(year, month)
-        if not data:
-            return {"success": True, "data": []}
-            
-        # Sanitización manual de NaNs
-        for record in data:
-            for key, value in record.items():
-                if isinstance(value, float):
-                    if pd.isna(value) or value == float('inf') or value == float('-inf'):
-                        record[key] = None
-                        
-        return {"success": True, "data": data}
+        # Usar nueva función unificada (NaN/inf -> null al serializar)
+        return cached_json_response(
+            "forecast-calculated", {"year": year, "month": month},
+            FORECAST_SOURCES,
+            lambda: {"success": True, "data": get_forecast_data(year, month) or []},
+            headers=cache_headers
+        )
     except Exception as e:
         print(f"Error calculating forecast: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/api/forecast-available-months")
+@router.get("/api/forecast-available-months", dependencies=[conditional("forecast-months", (data_versions.SNAPSHOT,), cache_control=METADATA_CACHE_CONTROL)])
 async def get_forecast_available_months():
     """
     Automatically detect available months from data by scanning FECHA EXPEDICION NEGOCIO.
@@ -80,228 +83,64 @@ async def get_forecast_available_months():
         return {"success": False, "months": [], "error": str(e)}
 
 @router.get("/api/dashboard/stats", dependencies=[Depends(get_current_user)])
-def get_dashboard_stats(year: int, month: int):
+def get_dashboard_stats(year: int, month: int, cache_headers: dict = conditional("dashboard-stats", STATE_SOURCES, vary=(_today,))):
     """
     Obtiene estadísticas del dashboard para un mes específico.
     """
     try:
-        # Obtener datos de detalle usando unificado
-        all_data = get_all_records()
-        
-        if not all_data:
-             return {"success": False, "error": "No data available"}
-             
-        month_data = []
-        
-        for record in all_data:
-            # Buscar fecha en varias columnas posibles
-            fecha_val = record.get('FECHA_EXPEDICION') or record.get('FECHA EXPEDICION NEGOCIO DIA-MES-AÑO') or record.get('FECHA EXPEDICION NEGOCIO')
-            
-            if not fecha_val:
-                continue
-                
-            fecha_dt = None
-            try:
-                if isinstance(fecha_val, str):
-                    if 'T' in fecha_val:
-                        fecha_dt = datetime.fromisoformat(fecha_val)
-                    else:
-                        for fmt in ["%Y-%m-%d", "%d/%m/%Y", "%Y/%m/%d"]:
-                            try:
-                                fecha_dt = datetime.strptime(fecha_val, fmt)
-                                break
-                            except:
-                                continue
-                elif isinstance(fecha_val, (datetime, pd.Timestamp)): # pd.Timestamp fix
-                     fecha_dt = fecha_val
-            except:
-                pass
-                
-            if fecha_dt:
-                 r_year = fecha_dt.year
-                 r_month = fecha_dt.month
-                 if r_year == year and r_month == month:
-                     month_data.append(record)
-        
-        # Cargar estados guardados
-        base_dir = os.path.dirname(os.path.dirname(__file__))
-        policy_states_path = os.path.join(base_dir, 'data', 'policy_states.json')
-        
-        state_manager = PolicyStateManager(file_path=policy_states_path)
-        saved_states = state_manager.get_all_states()
-        
-        # Contar estados
-        pendientes = []
-        recaudadas = []
-        anuladas = []
-        
-        for record in month_data:
-            consecutivo = str(record.get('CONSECUTIVO', ''))
-            
-            # Obtener estado
-            estado_config = saved_states.get(consecutivo)
-            if estado_config and isinstance(estado_config, dict):
-                estado_final = estado_config.get('estado', '')
-            else:
-                estado_excel = str(record.get('ESTADO', '')).upper()
-                if 'RECAUD' in estado_excel or 'PAGAD' in estado_excel:
-                    estado_final = 'RECAUDADA'
-                elif 'ANULAD' in estado_excel or 'CANCEL' in estado_excel:
-                    estado_final = 'ANULADA'
-                else:
-                    estado_final = 'PENDIENTE'
-            
-            estado_final = estado_final.upper()
-            
-            if 'RECAUDADA' in estado_final:
-                recaudadas.append(record)
-            elif 'ANULADA' in estado_final:
-                anuladas.append(record)
-            else:
-                pendientes.append(record)
-        
-        def calculate_total_usd(records):
-            total = 0.0
-            for r in records:
-                val = r.get('PRIMA_TOTAL_USD', 0)
-                if val == 0:
-                     val = r.get('PRIMA_SIN_IVA_USD', 0)
-                total += clean_currency(val)
-            return total
-
-        total_usd_recaudadas = calculate_total_usd(recaudadas)
-        total_usd_pendientes = calculate_total_usd(pendientes)
-        total_usd_anuladas = calculate_total_usd(anuladas)
-        total_usd = total_usd_recaudadas + total_usd_pendientes + total_usd_anuladas
-        
-        efectividad_recaudo = round((total_usd_recaudadas / total_usd * 100), 1) if total_usd > 0 else 0
-
-        # Alertas de pendientes > 20 días
-        today = datetime.now()
-        pendientes_20_dias = []
-        
-        for record in pendientes:
-            fecha_val = record.get('FECHA EXPEDICION NEGOCIO DIA-MES-AÑO') or record.get('FECHA_EXPEDICION')
-            if not fecha_val: continue
-            
-            try:
-                if isinstance(fecha_val, str):
-                    if 'T' in fecha_val:
-                        fecha_dt = datetime.fromisoformat(fecha_val)
-                    else: 
-                         # Try simple parsing if allowed, but unified usually has ISO
-                         try:
-                             fecha_dt = datetime.strptime(fecha_val, "%Y-%m-%d") 
-                         except:
-                             continue
-                else:
-                    fecha_dt = fecha_val
-                
-                # Check delta
-                if isinstance(fecha_dt, datetime):
-                    delta = today - fecha_dt
-                else:
-                    # pd.Timestamp or date
-                    delta = today - pd.to_datetime(fecha_dt) # ensure format
-
-                if hasattr(delta, 'days'):
-                    dias = delta.days
-                    if dias > 20:
-                        rec = record.copy()
-                        rec['dias_pendiente'] = dias
-                        pendientes_20_dias.append(rec)
-            except:
-                pass
-        
-        pendientes_20_dias.sort(key=lambda x: x.get('dias_pendiente', 0), reverse=True)
-        
-        return {
-            "success": True,
-            "year": year,
-            "month": month,
-            "summary": {
-                "total": len(month_data),
-                "pendientes": len(pendientes),
-                "recaudadas": len(recaudadas),
-                "anuladas": len(anuladas),
-                "total_usd_recaudadas": total_usd_recaudadas,
-                "total_usd_pendientes": total_usd_pendientes,
-                "total_usd_anuladas": total_usd_anuladas,
-                "recaudo_percentage_count": round((len(recaudadas) / len(month_data) * 100), 1) if month_data else 0,
-                "efectividad_recaudo": efectividad_recaudo
-            },
-            "alerts": {
-                "pendientes_20_dias_count": len(pendientes_20_dias),
-                "pendientes_20_dias_list": pendientes_20_dias
-            }
-        }
-
+        # Las alertas por antigüedad dependen del día actual
+        return cached_json_response(
+            "dashboard-stats", {"year": year, "month": month, "today": _today()},
+            STATE_SOURCES,
+            lambda: build_dashboard_stats(year, month),
+            headers=cache_headers
+        )
     except Exception as e:
         print(f"[DASHBOARD] Error: {e}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/api/cobros/pending", dependencies=[Depends(get_current_user)])
-def get_cobros_pending():
+@router.get("/api/dashboard/aging", dependencies=[Depends(get_current_user), conditional("dashboard-aging", STATE_SOURCES, vary=(_today,))])
+def get_dashboard_aging(buckets: str = None):
     """
-    Retorna TODAS las pólizas pendientes agrupadas por RESPONSABLE.
+    Histograma de pólizas pendientes por días desde la expedición, con conteo y USD por regional.
+    buckets: límites superiores separados por coma (por defecto 20,45,90 -> 0-20, 21-45, 46-90, >90).
     """
     try:
-        from services.unified_data_processor import get_all_records
-        
-        all_data = get_all_records() or []
-        
-        # Cargar Mapping Responsables
-        base_dir = os.path.dirname(os.path.dirname(__file__))
-        mapping_path = os.path.join(base_dir, 'data', 'responsables_mapping.json')
-        responsables_map = {}
-        if os.path.exists(mapping_path):
-            with open(mapping_path, 'r', encoding='utf-8') as f:
-                responsables_map = json.load(f)
-                
-        # Cargar Estados Guardados
-        policy_states_path = os.path.join(base_dir, 'data', 'policy_states.json')
-        state_manager = PolicyStateManager(file_path=policy_states_path)
-        saved_states = state_manager.get_all_states()
-        
-        grouped = {}
-        
-        for record in all_data:
-            consecutivo = str(record.get('CONSECUTIVO', ''))
-            
-            # Determinar Estado
-            estado_config = saved_states.get(consecutivo)
-            if estado_config:
-                 estado_final = estado_config.get('estado', '')
-            else:
-                 estado_final = 'PENDIENTE' # Default si no está guardado? 
-                 # Unified data 'ESTADO' might be 'Solicitud en estudio' etc.
-                 # Replicar lógica simple: si no dice RECAUDADA o ANULADA es PENDIENTE
-                 est_excel = str(record.get('ESTADO', '')).upper()
-                 if 'RECAUD' in est_excel or 'PAGAD' in est_excel: estado_final = 'RECAUDADA'
-                 elif 'ANULAD' in est_excel or 'CANCEL' in est_excel: estado_final = 'ANULADA'
-                 else: estado_final = 'PENDIENTE'
+        edges = [int(b) for b in buckets.split(',') if b.strip()] if buckets else DEFAULT_BUCKETS
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Buckets inválidos: {buckets}")
+    try:
+        return {"success": True, **get_aging_histogram(edges)}
+    except Exception as e:
+        print(f"[DASHBOARD] Error aging: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-            if estado_final != 'PENDIENTE':
-                continue
-                
-            # Agrupar por Regional
-            regional = record.get('REGIONAL', 'SIN REGIONAL')
-            responsable = responsables_map.get(regional, 'SIN ASIGNAR')
-            
-            if responsable not in grouped:
-                grouped[responsable] = {'items': [], 'total_usd': 0, 'count': 0}
-            
-            grouped[responsable]['items'].append(record)
-            
-            # Sumar
-            val = record.get('PRIMA_TOTAL_USD', 0) or record.get('PRIMA_SIN_IVA_USD', 0)
-            grouped[responsable]['total_usd'] += clean_currency(val)
-            grouped[responsable]['count'] += 1
-            
-        return {"success": True, "data": grouped}
+@router.get("/api/cobros/pending", dependencies=[Depends(get_current_user)])
+def get_cobros_pending(cache_headers: dict = conditional("cobros", STATE_SOURCES, stamps=(mapping_stamp,))):
+    """
+    Retorna el resumen de pólizas pendientes agrupadas por RESPONSABLE (totales y conteos).
+    Los items de cada responsable se consultan paginados en /api/cobros/pending/{responsable}.
+    """
+    try:
+        return FastJSONResponse({"success": True, **get_cobros_summary()}, headers=cache_headers)
+    except Exception as e:
+        print(f"[COBROS] Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/api/cobros/pending/{responsable}", dependencies=[Depends(get_current_user)])
+def get_cobros_pending_items(responsable: str, page: int = 1, page_size: int = 50, sort: str = 'prima',
+                             cache_headers: dict = conditional("cobros-items", STATE_SOURCES, stamps=(mapping_stamp,), vary=(_today,))):
+    """
+    Página de pólizas pendientes de un responsable, ordenadas por prima ('prima') o antigüedad ('age').
+    """
+    if sort not in SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"Orden inválido: {sort}")
+    try:
+        page = max(1, page)
+        page_size = max(1, min(page_size, 500))
+        return FastJSONResponse({"success": True, **get_cobros_items(responsable, page, page_size, sort)}, headers=cache_headers)
     except Exception as e:
         print(f"[COBROS] Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from dependencies import get_current_user
+from services.export_stream import stream_dataset, DATASETS, EXPORT_FORMATS
+from services.projection import parse_fields
+
+router = APIRouter()
+
+@router.get("/api/export/{dataset}", dependencies=[Depends(get_current_user)])
+def export_dataset(dataset: str, format: str = 'ndjson', fields: str = None):
+    """
+    Exporta un dataset completo en streaming.
+    dataset: reporte (snapshot unificado), cancelaciones o renewals; format: ndjson o csv.
+    fields=COL1,COL2 limita las columnas exportadas.
+    """
+    if dataset not in DATASETS:
+        raise HTTPException(status_code=404, detail=f"Dataset inválido: {dataset}. Use {', '.join(DATASETS)}")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Formato inválido: {format}. Use {', '.join(EXPORT_FORMATS)}")
+    try:
+        body, media_type, filename = stream_dataset(dataset, format, parse_fields(fields))
+    except Exception as e:
+        print(f"[EXPORT] Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return StreamingResponse(body, media_type=media_type,
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
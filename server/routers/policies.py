@@ -0,0 +1,111 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+from datetime import date
+import os
+import tempfile
+from dependencies import get_current_user
+from services.policy_join import get_policy_360, join_cancelaciones_with_reporte
+from services.cancelaciones_service import get_cancelaciones_source_version, CANCELACIONES_INPUTS
+from services.renewals_service import get_renewals_source_version
+from services.http_cache import conditional
+from services.policy_state_manager import policy_state_manager
+from services.policy_history import get_month_states_as_of, day_bounds
+from services.policy_state_importer import import_policy_states, IMPORT_USER
+from services import data_versions
+
+router = APIRouter()
+
+MAX_IMPORT_BYTES = 50 * 1024 * 1024
+
+@router.get("/api/policy/{policy_id}", dependencies=[Depends(get_current_user), conditional("policy-360", (data_versions.SNAPSHOT, data_versions.POLICY_STATES, CANCELACIONES_INPUTS), stamps=(get_cancelaciones_source_version, get_renewals_source_version))])
+def get_policy_view(policy_id: str):
+    """
+    Vista 360° de una póliza: REPORTE, estados guardados, Cancelaciones y Renovaciones.
+    """
+    try:
+        return {"success": True, "data": get_policy_360(policy_id)}
+    except Exception as e:
+        print(f"[POLICY] Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/api/joins/cancelaciones-reporte", dependencies=[Depends(get_current_user), conditional("join-cancelaciones-reporte", (data_versions.SNAPSHOT, CANCELACIONES_INPUTS), stamps=(get_cancelaciones_source_version,))])
+def get_cancelaciones_reporte_join(estado_actual: Optional[str] = None, only_matched: bool = False):
+    """
+    Cancelaciones con su prima original y regional desde el REPORTE.
+    """
+    try:
+        data = join_cancelaciones_with_reporte(estado_actual, only_matched)
+        return {"success": True, "data": data, "total": len(data)}
+    except Exception as e:
+        print(f"[JOIN] Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# ==================== HISTORIA DE ESTADOS ====================
+
+@router.get("/api/policy-states/history/{consecutivo}", dependencies=[Depends(get_current_user), conditional("policy-state-history", (data_versions.POLICY_STATES,))])
+def get_policy_state_history(consecutivo: str):
+    """Transiciones de estado de una póliza (más antigua primero)."""
+    try:
+        return {"success": True, "data": policy_state_manager.get_history(consecutivo.strip())}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/api/policy-states/transitions", dependencies=[Depends(get_current_user), conditional("policy-state-transitions", (data_versions.POLICY_STATES,))])
+def get_policy_state_transitions(usuario: Optional[str] = None, desde: Optional[str] = None, hasta: Optional[str] = None, limit: int = 1000):
+    """Transiciones por usuario y/o rango de fechas (YYYY-MM-DD), más recientes primero."""
+    try:
+        start, end = day_bounds(desde, hasta)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Fechas inválidas (use YYYY-MM-DD)")
+    try:
+        data = policy_state_manager.get_transitions(usuario, start, end, min(max(limit, 1), 10000))
+        return {"success": True, "data": data, "total": len(data)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/api/policy-states/as-of", dependencies=[Depends(get_current_user), conditional("policy-states-as-of", (data_versions.SNAPSHOT, data_versions.POLICY_STATES))])
+def get_policy_states_as_of(year: int, month: int, fecha: str):
+    """Estado de las pólizas de un mes tal como estaba en una fecha (YYYY-MM-DD)."""
+    try:
+        as_of = date.fromisoformat(fecha)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Fecha inválida (use YYYY-MM-DD)")
+    try:
+        return {"success": True, **get_month_states_as_of(year, month, as_of)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/api/policy-states/import", dependencies=[Depends(get_current_user)])
+async def import_policy_states_endpoint(request: Request, usuario: str = IMPORT_USER, dry_run: bool = False):
+    """
+    Importa estados desde un Excel (.xlsx) enviado como cuerpo de la solicitud
+    (columnas CONSECUTIVO / ESTADO). Todos los cambios se guardan en una transacción.
+    """
+    declared = request.headers.get('content-length')
+    if declared and declared.isdigit() and int(declared) > MAX_IMPORT_BYTES:
+        raise HTTPException(status_code=413, detail="Archivo demasiado grande")
+
+    # El cuerpo se copia al temporal por bloques: nunca se tiene completo en memoria
+    fd, path = tempfile.mkstemp(suffix='.xlsx')
+    try:
+        size = 0
+        with os.fdopen(fd, 'wb') as f:
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > MAX_IMPORT_BYTES:
+                    raise HTTPException(status_code=413, detail="Archivo demasiado grande")
+                f.write(chunk)
+        if not size:
+            raise HTTPException(status_code=400, detail="Envíe el archivo .xlsx en el cuerpo de la solicitud")
+        summary = await run_in_threadpool(import_policy_states, path, usuario, dry_run)
+        return {"success": True, "data": summary}
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"[IMPORT] Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        os.remove(path)
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+from typing import List, Dict, Any
+from dependencies import get_current_user
+from services.aggregation import run_aggregation, AggregationQueryError, DIMENSIONS, MEASURES
+
+router = APIRouter()
+
+class AggregateRequest(BaseModel):
+    group_by: List[str] = []
+    measures: List[str] = ['count']
+    filters: Dict[str, Any] = {}
+
+@router.get("/api/query/schema", dependencies=[Depends(get_current_user)])
+def get_query_schema():
+    """Dimensiones y medidas disponibles para /api/query/aggregate."""
+    return {"success": True, "dimensions": list(DIMENSIONS), "measures": list(MEASURES)}
+
+@router.post("/api/query/aggregate", dependencies=[Depends(get_current_user)])
+def aggregate_endpoint(request: AggregateRequest):
+    """
+    Agregación genérica sobre el snapshot unificado.
+    Ej: {"group_by": ["REGIONAL", "ESTADO_FINAL"], "measures": ["count", "sum:PRIMA_TOTAL_USD"], "filters": {"AÑO": 2025}}
+    """
+    try:
+        result = run_aggregation(request.group_by, request.measures, request.filters)
+        return {"success": True, **result}
+    except AggregationQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"[QUERY] Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from pydantic import BaseModel
+from dependencies import get_current_user
+from services.report_jobs import request_report, get_job, get_report_file
+
+router = APIRouter()
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+class ReportRequest(BaseModel):
+    year: int
+    month: int
+
+@router.post("/api/reports/xlsx", dependencies=[Depends(get_current_user)])
+def create_xlsx_report(request: ReportRequest):
+    """
+    Solicita el reporte XLSX (Forecast, Dashboard, Pendientes por responsable) de un mes.
+    Se genera en segundo plano; si ya existe para los datos actuales se retorna terminado.
+    """
+    if not 1 <= request.month <= 12:
+        raise HTTPException(status_code=400, detail=f"Mes inválido: {request.month}")
+    try:
+        return {"success": True, "job": request_report(request.year, request.month)}
+    except Exception as e:
+        print(f"[REPORTS] Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/api/reports/{job_id}", dependencies=[Depends(get_current_user)])
+def get_report_status(job_id: str):
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Reporte no encontrado: {job_id}")
+    return {"success": True, "job": job}
+
+@router.get("/api/reports/{job_id}/download", dependencies=[Depends(get_current_user)])
+def download_report(job_id: str):
+    path = get_report_file(job_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Reporte no disponible: {job_id}")
+    return FileResponse(path, media_type=XLSX_MEDIA_TYPE, filename=path.name)
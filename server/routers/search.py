@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends, HTTPException
+from dependencies import get_current_user
+from services.search_index import search_records
+from services.global_search import global_search
+from services.cancelaciones_service import get_cancelaciones_source_version, CANCELACIONES_INPUTS
+from services.renewals_service import get_renewals_source_version
+from services.http_cache import conditional
+from services import data_versions
+
+router = APIRouter()
+
+@router.get("/api/search", dependencies=[Depends(get_current_user), conditional("search", (data_versions.SNAPSHOT,))])
+def search_endpoint(q: str, limit: int = 20):
+    """
+    Búsqueda de texto libre sobre ASEGURADO, POLIZA y CONSECUTIVO del REPORTE unificado.
+    Coincide por prefijo e ignora tildes/mayúsculas.
+    """
+    try:
+        limit = max(1, min(limit, 200))
+        result = search_records(q, limit)
+        return {"success": True, **result}
+    except Exception as e:
+        print(f"[SEARCH] Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/api/search/global", dependencies=[Depends(get_current_user), conditional("search-global", (data_versions.SNAPSHOT, CANCELACIONES_INPUTS), stamps=(get_cancelaciones_source_version, get_renewals_source_version))])
+def global_search_endpoint(q: str, limit: int = 20):
+    """
+    Búsqueda global agrupada por póliza sobre REPORTE, Consecutivos, Cancelaciones y Renovaciones.
+    """
+    try:
+        limit = max(1, min(limit, 100))
+        result = global_search(q, limit)
+        return {"success": True, **result}
+    except Exception as e:
+        print(f"[GLOBAL-SEARCH] Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -7,7 +7,14 @@ from services.unified_data_processor import (
     get_consecutivos_by_filters, clear_all_caches
 )
 from services.consecutivos_api_client import consultar_estado_consecutivo, get_operation_mode, set_operation_mode
+from services.response_cache import cached_json_response
+from services.http_cache import conditional, METADATA_CACHE_CONTROL
+from services.fast_json import FastJSONResponse
+from services.columnar import get_todos_columns, get_todos_columns_page, FORMATS
+from services.projection import parse_fields, project, fields_key
+from services import data_versions
 from pydantic import BaseModel
+from typing import List
 import os
 import json
 
@@ -28,6 +35,11 @@ class UpdateMonthRequest(BaseModel):
     month: str
     year: int
 
+class ConsecutivosBatchRequest(BaseModel):
+    ids: List[str]
+
+MAX_BATCH_IDS = 1000
+
 # Helper
 def has_read_credentials():
     # Helper duplicated or imported? Let's duplicate specifically for this scope or rely on a config file.
@@ -60,21 +72,43 @@ def get_sheet_data(request: SheetRequest):
         return {"data": data, "source": "Simulation"}
 
 @router.get("/api/reporte/all", dependencies=[Depends(get_current_user)])
-def get_all_reporte_data(page: int = 1, page_size: int = 100):
+def get_all_reporte_data(page: int = 1, page_size: int = 100, format: str = 'rows', fields: str = None,
+                         cache_headers: dict = conditional("reporte-all", (data_versions.SNAPSHOT,))):
+    """
+    format=columns retorna columnas + arreglos (categóricas como diccionario + códigos).
+    fields=COL1,COL2 limita las columnas retornadas.
+    """
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Formato inválido: {format}. Use {', '.join(FORMATS)}")
+    field_list = parse_fields(fields)
     try:
         print(f"[REPORTE] Usando caché unificado (página {page})")
+        if format == 'columns':
+            columns = get_todos_columns_page(page, page_size, field_list)
+            total = get_todos_columns().length
+            return FastJSONResponse({
+                "success": True,
+                **columns,
+                "pagination": {
+                    "page": page,
+                    "page_size": page_size,
+                    "total": total,
+                    "total_pages": (total + page_size - 1) // page_size
+                }
+            }, headers=cache_headers)
+
         result = get_all_records_paginated(page, page_size)
         
-        return {
+        return FastJSONResponse({
             "success": True,
-            "data": result['data'],
+            "data": project(result['data'], field_list),
             "pagination": {
                 "page": result['page'],
                 "page_size": result['page_size'],
                 "total": result['total'],
                 "total_pages": result['total_pages']
             }
-        }
+        }, headers=cache_headers)
     except Exception as e:
         print(f"[ERROR] get_all_reporte_data: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -104,7 +138,7 @@ def refresh_data_endpoint():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error actualizando datos: {str(e)}")
 
-@router.get("/api/consecutivos-pendientes", dependencies=[Depends(get_current_user)])
+@router.get("/api/consecutivos-pendientes", dependencies=[Depends(get_current_user), conditional("consecutivos-meses", (data_versions.SNAPSHOT,), cache_control=METADATA_CACHE_CONTROL)])
 def get_consecutivos_pendientes():
     try:
         from services.unified_data_processor import load_unified_cache
@@ -146,7 +180,10 @@ def get_consecutivos_pendientes():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/api/consecutivos-pendientes/{month_year}", dependencies=[Depends(get_current_user)])
-def get_consecutivos_by_month(month_year: str):
+def get_consecutivos_by_month(month_year: str, fields: str = None,
+                              cache_headers: dict = conditional("consecutivos-pendientes", (data_versions.SNAPSHOT, data_versions.CONSECUTIVOS_ESTADOS))):
+    """fields=COL1,COL2 limita las columnas retornadas."""
+    field_list = parse_fields(fields)
     try:
         parts = month_year.split()
         if len(parts) != 2: raise HTTPException(status_code=400, detail="Formato inválido")
@@ -155,8 +192,12 @@ def get_consecutivos_by_month(month_year: str):
         month_map = {'ENE': 1, 'FEB': 2, 'MAR': 3, 'ABR': 4, 'MAY': 5, 'JUN': 6, 'JUL': 7, 'AGO': 8, 'SEP': 9, 'OCT': 10, 'NOV': 11, 'DIC': 12, 'ENERO': 1, 'FEBRERO': 2, 'MARZO': 3, 'ABRIL': 4, 'MAYO': 5, 'JUNIO': 6, 'JULIO': 7, 'AGOSTO': 8, 'SEPTIEMBRE': 9, 'OCTUBRE': 10, 'NOVIEMBRE': 11, 'DICIEMBRE': 12}
         mes_num = month_map.get(mes_input.upper())
         
-        consecutivos = get_consecutivos_by_filters(year=año_input, month=mes_num)
-        return {"success": True, "data": consecutivos}
+        return cached_json_response(
+            "consecutivos-pendientes", {"year": año_input, "month": mes_num, "fields": fields_key(field_list)},
+            (data_versions.SNAPSHOT, data_versions.CONSECUTIVOS_ESTADOS),
+            lambda: {"success": True, "data": project(get_consecutivos_by_filters(year=año_input, month=mes_num), field_list)},
+            headers=cache_headers
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
@@ -173,6 +214,29 @@ def consultar_estado_endpoint(request: ConsecutivoStatusRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/api/consecutivos/{consecutivo}", dependencies=[Depends(get_current_user), conditional("consecutivo-detail", (data_versions.SNAPSHOT, data_versions.POLICY_STATES, data_versions.CONSECUTIVOS_ESTADOS, data_versions.CONSECUTIVOS_PRIMAS))])
+def get_consecutivo_detail_endpoint(consecutivo: str):
+    try:
+        from services.consecutivo_lookup import get_consecutivo_detail
+        detail = get_consecutivo_detail(consecutivo)
+        if not detail['found']:
+            raise HTTPException(status_code=404, detail=f"Consecutivo no encontrado: {consecutivo}")
+        return {"success": True, "data": detail}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/api/consecutivos/batch", dependencies=[Depends(get_current_user)])
+def get_consecutivos_batch_endpoint(request: ConsecutivosBatchRequest):
+    if len(request.ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"Máximo {MAX_BATCH_IDS} consecutivos por lote")
+    try:
+        from services.consecutivo_lookup import get_consecutivos_details
+        return {"success": True, "data": get_consecutivos_details(request.ids)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/api/consecutivos/actualizar-prima", dependencies=[Depends(get_current_user)])
 def actualizar_prima_endpoint(request: UpdatePrimaRequest):
     return {"success": True, "message": "Prima actualizada en frontend"}
@@ -0,0 +1,134 @@
+"""
+Consultas genéricas group-by / agregación sobre el snapshot columnar.
+Permite construir nuevos widgets del dashboard sin escribir un loop nuevo por
+reporte; los resultados se cachean por generación del snapshot (y por versión
+de estados guardados cuando la consulta usa el estado final).
+"""
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from services import data_versions
+from services.state_overlay import get_final_state_overlay, FINAL_STATES
+from services.unified_data_processor import get_todos_dataframe, get_snapshot_generation
+
+FINAL_STATE_DIM = 'ESTADO_FINAL'
+DIMENSIONS = ('AÑO', 'MES', 'REGIONAL', 'LOCALIDAD', 'PRODUCTO', 'CORREDOR', 'ESTADO', FINAL_STATE_DIM)
+SUM_COLUMNS = ('PRIMA_TOTAL_USD', 'PRIMA_SIN_IVA_USD')
+MEASURES = ('count',) + tuple(f"sum:{c}" for c in SUM_COLUMNS)
+
+MAX_CACHED_QUERIES = 256
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+class AggregationQueryError(ValueError):
+    """Consulta de agregación inválida (dimensión, medida o filtro desconocido)."""
+
+def _validate(group_by, measures, filters):
+    for dim in list(group_by) + list(filters.keys()):
+        if dim not in DIMENSIONS:
+            raise AggregationQueryError(f"Dimensión inválida: {dim}. Use {', '.join(DIMENSIONS)}")
+    for measure in measures:
+        if measure not in MEASURES:
+            raise AggregationQueryError(f"Medida inválida: {measure}. Use {', '.join(MEASURES)}")
+
+def _column(df, dim, final_states):
+    if dim == FINAL_STATE_DIM:
+        return pd.Series(pd.Categorical.from_codes(final_states, FINAL_STATES), index=df.index)
+    return df[dim]
+
+def _coerce_values(series, values):
+    values = values if isinstance(values, list) else [values]
+    if pd.api.types.is_integer_dtype(series.dtype):
+        try:
+            return [int(v) for v in values]
+        except (TypeError, ValueError):
+            raise AggregationQueryError(f"Filtro numérico inválido: {values}")
+    return [str(v) for v in values]
+
+def _run(group_by, measures, filters):
+    df = get_todos_dataframe()
+    if df.empty:
+        return []
+
+    uses_final_state = FINAL_STATE_DIM in group_by or FINAL_STATE_DIM in filters
+    final_states = None
+    if uses_final_state:
+        # Copia de los códigos del overlay: una lectura consistente aunque se parcheen durante la consulta
+        final_states = np.frombuffer(get_final_state_overlay().codes, dtype=np.uint8).astype(np.int8)
+
+    # 1. Filtros (máscara vectorizada)
+    mask = np.ones(len(df), dtype=bool)
+    for dim, values in filters.items():
+        series = _column(df, dim, final_states)
+        mask &= series.isin(_coerce_values(series, values)).to_numpy()
+
+    # 2. Frame mínimo con solo las columnas necesarias
+    frame = pd.DataFrame({dim: _column(df, dim, final_states) for dim in group_by}, index=df.index)
+    sum_cols = [m.split(':', 1)[1] for m in measures if m.startswith('sum:')]
+    for col in sum_cols:
+        frame[col] = df[col] if col in df.columns else 0.0
+    frame = frame[mask]
+
+    # 3. Agregación
+    if not group_by:
+        row = {}
+        for measure in measures:
+            row[measure] = int(len(frame)) if measure == 'count' else float(frame[measure.split(':', 1)[1]].sum())
+        return [row]
+
+    grouped = frame.groupby(list(group_by), observed=True, sort=True)
+    result = pd.DataFrame(index=grouped.size().index)
+    for measure in measures:
+        if measure == 'count':
+            result['count'] = grouped.size()
+        else:
+            result[measure] = grouped[measure.split(':', 1)[1]].sum()
+    result = result.reset_index()
+
+    rows = []
+    for values in result.itertuples(index=False, name=None):
+        row = {}
+        for col, value in zip(result.columns, values):
+            if isinstance(value, np.integer):
+                value = int(value)
+            elif isinstance(value, np.floating):
+                value = float(value)
+            row[col] = value
+        rows.append(row)
+    return rows
+
+def run_aggregation(group_by=None, measures=None, filters=None) -> dict:
+    """
+    Ejecuta una consulta de agregación.
+    group_by: lista de dimensiones; measures: 'count' / 'sum:<columna>'; filters: {dim: valor | [valores]}.
+    """
+    group_by = list(group_by or [])
+    measures = list(measures or ['count'])
+    filters = dict(filters or {})
+    _validate(group_by, measures, filters)
+
+    uses_final_state = FINAL_STATE_DIM in group_by or FINAL_STATE_DIM in filters
+    versions = (get_snapshot_generation(),
+                data_versions.get_version(data_versions.POLICY_STATES) if uses_final_state else None)
+    key = (versions, json.dumps([group_by, measures, filters], sort_keys=True, ensure_ascii=False))
+
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return {'data': _cache[key], 'cached': True}
+
+    rows = _run(group_by, measures, filters)
+
+    with _lock:
+        # Descartar resultados de generaciones anteriores
+        for stale in [k for k in _cache if k[0][0] != versions[0]]:
+            del _cache[stale]
+        _cache[key] = rows
+        while len(_cache) > MAX_CACHED_QUERIES:
+            _cache.popitem(last=False)
+    return {'data': rows, 'cached': False}
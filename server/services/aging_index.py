@@ -0,0 +1,211 @@
+"""
+Índice de antigüedad de pólizas pendientes, ordenado por fecha de expedición.
+Cualquier ventana de días pendiente (0-20, 21-45, ...) se resuelve con búsquedas
+binarias; conteos y USD por regional salen de árboles de Fenwick indexados por día.
+Se mantiene incrementalmente con los cambios del overlay de estados.
+"""
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+from services.state_overlay import get_final_state_overlay, add_listener, PENDIENTE
+from services.cobros_index import fecha_ordinal, record_value_usd
+
+DEFAULT_BUCKETS = (20, 45, 90)
+
+_lock = threading.Lock()
+_state = {'index': None}
+
+class _Fenwick:
+    """Árbol de Fenwick: sumas de prefijo con actualización puntual en O(log n)."""
+
+    def __init__(self, size):
+        self.size = size
+        self.tree = [0.0] * (size + 1)
+
+    def add(self, i, delta):
+        i += 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, i):
+        """Suma de [0, i] (i < 0 -> 0)."""
+        i = min(i, self.size - 1) + 1
+        total = 0.0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def range(self, lo, hi):
+        if hi < lo:
+            return 0.0
+        return self.prefix(hi) - self.prefix(lo - 1)
+
+class AgingIndex:
+    def __init__(self, overlay):
+        self.overlay = overlay
+        self.dirty = False
+        todos = overlay.todos
+        self.fechas = [fecha_ordinal(r.get('FECHA_EXPEDICION')) for r in todos]
+        self.values = [record_value_usd(r) for r in todos]
+
+        known = [f for f in self.fechas if f is not None]
+        self.base = min(known) if known else 0
+        self.span = (max(known) - self.base + 1) if known else 1
+
+        self.entries = []          # [(ordinal, pos)] ordenado
+        self.sin_fecha = set()     # pendientes sin fecha de expedición
+        self.regionales = {}       # regional -> (Fenwick conteo, Fenwick USD)
+
+        for pos in range(len(todos)):
+            if overlay.codes[pos] == PENDIENTE:
+                self._add(pos, bulk=True)
+        self.entries.sort()
+
+    def _trees(self, regional):
+        trees = self.regionales.get(regional)
+        if trees is None:
+            trees = self.regionales[regional] = (_Fenwick(self.span), _Fenwick(self.span))
+        return trees
+
+    def _add(self, pos, bulk=False):
+        fecha = self.fechas[pos]
+        if fecha is None:
+            self.sin_fecha.add(pos)
+            return
+        entry = (fecha, pos)
+        if bulk:
+            self.entries.append(entry)
+        else:
+            i = bisect_left(self.entries, entry)
+            if i < len(self.entries) and self.entries[i] == entry:
+                return
+            self.entries.insert(i, entry)
+        counts, usd = self._trees(self.overlay.todos[pos].get('REGIONAL', 'SIN REGIONAL'))
+        counts.add(fecha - self.base, 1)
+        usd.add(fecha - self.base, self.values[pos])
+
+    def _remove(self, pos):
+        fecha = self.fechas[pos]
+        if fecha is None:
+            self.sin_fecha.discard(pos)
+            return
+        entry = (fecha, pos)
+        i = bisect_left(self.entries, entry)
+        if i >= len(self.entries) or self.entries[i] != entry:
+            return
+        del self.entries[i]
+        counts, usd = self._trees(self.overlay.todos[pos].get('REGIONAL', 'SIN REGIONAL'))
+        counts.add(fecha - self.base, -1)
+        usd.add(fecha - self.base, -self.values[pos])
+
+    def apply(self, changes):
+        for pos, _, new in changes:
+            if new == PENDIENTE:
+                self._add(pos)
+            else:
+                self._remove(pos)
+
+    def positions_between(self, start_ordinal, end_ordinal) -> list:
+        """Posiciones pendientes con fecha en [start, end], de la más antigua a la más reciente."""
+        lo = bisect_left(self.entries, (start_ordinal, -1))
+        hi = bisect_right(self.entries, (end_ordinal, float('inf')))
+        return [pos for _, pos in self.entries[lo:hi]]
+
+    def window_by_regional(self, start_ordinal, end_ordinal) -> dict:
+        """{regional: {count, total_usd}} para fechas en [start, end]."""
+        lo = max(start_ordinal - self.base, 0)
+        hi = min(end_ordinal - self.base, self.span - 1)
+        result = {}
+        for regional, (counts, usd) in self.regionales.items():
+            count = int(round(counts.range(lo, hi)))
+            if count:
+                result[regional] = {'count': count, 'total_usd': usd.range(lo, hi)}
+        return result
+
+def _on_overlay_change(overlay, changes):
+    with _lock:
+        index = _state['index']
+        if index is None or index.overlay is not overlay:
+            return
+        if changes is None:
+            index.dirty = True
+        else:
+            index.apply(changes)
+
+add_listener(_on_overlay_change)
+
+def get_aging_index() -> AgingIndex:
+    overlay = get_final_state_overlay()
+    index = _state['index']
+    if index is None or index.overlay is not overlay or index.dirty:
+        with _lock:
+            index = _state['index']
+            if index is None or index.overlay is not overlay or index.dirty:
+                index = AgingIndex(overlay)
+                _state['index'] = index
+    return index
+
+def get_pending_older_than(days: int, year: int = None, month: int = None) -> list:
+    """
+    Pendientes con más de `days` días desde la expedición (opcionalmente de un año/mes
+    de expedición), ordenados del más antiguo al más reciente, con 'dias_pendiente'.
+    """
+    index = get_aging_index()
+    today = date.today().toordinal()
+    start, end = index.base, today - days - 1
+    if year and month:
+        start = max(start, date(year, month, 1).toordinal())
+        next_month = date(year + (month == 12), month % 12 + 1, 1).toordinal()
+        end = min(end, next_month - 1)
+
+    with _lock:
+        positions = index.positions_between(start, end)
+    result = []
+    for pos in positions:
+        rec = index.overlay.todos[pos].copy()
+        rec['dias_pendiente'] = today - index.fechas[pos]
+        result.append(rec)
+    return result
+
+def get_aging_histogram(edges=DEFAULT_BUCKETS) -> dict:
+    """
+    Histograma de pendientes por antigüedad: con edges=(20, 45, 90) los buckets son
+    0-20, 21-45, 46-90 y >90 días. Cada bucket incluye conteo y USD por regional.
+    Las pendientes con fecha de expedición futura se cuentan en 'futuro' y las sin
+    fecha en 'sin_fecha': buckets + futuro + sin_fecha = total de pendientes.
+    """
+    index = get_aging_index()
+    today = date.today().toordinal()
+    edges = sorted(set(int(e) for e in edges if int(e) >= 0))
+
+    bounds = []
+    lower = 0
+    for edge in edges:
+        bounds.append((lower, edge))
+        lower = edge + 1
+    bounds.append((lower, None))
+
+    buckets = []
+    with _lock:
+        for min_days, max_days in bounds:
+            # Edad en [min_days, max_days] <=> fecha en [today - max_days, today - min_days]
+            start = today - max_days if max_days is not None else index.base
+            end = today - min_days
+            by_regional = index.window_by_regional(start, end)
+            buckets.append({
+                'label': f"{min_days}-{max_days}" if max_days is not None else (f">{min_days - 1}" if min_days else "0+"),
+                'min_days': min_days,
+                'max_days': max_days,
+                'count': sum(r['count'] for r in by_regional.values()),
+                'total_usd': sum(r['total_usd'] for r in by_regional.values()),
+                'by_regional': by_regional,
+            })
+        sin_fecha = len(index.sin_fecha)
+        futuro = len(index.entries) - bisect_right(index.entries, (today, float('inf')))
+        total = len(index.entries) + sin_fecha
+
+    return {'as_of': date.fromordinal(today).isoformat(), 'buckets': buckets,
+            'futuro': futuro, 'sin_fecha': sin_fecha, 'total': total}
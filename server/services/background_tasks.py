@@ -1,41 +1,15 @@
 import asyncio
-import os
-import json
-import pandas as pd
 from datetime import datetime, timedelta
-from services.unified_data_processor import get_consecutivos_pendientes_dataframe
+from services.unified_data_processor import (
+    get_consecutivos_pendientes_dataframe, consecutivos_recent_mask, consecutivos_month_mask, parse_month_name
+)
 from services.consecutivos_api_client import consultar_estado_consecutivo
-
-# Estado global para almacenar estados consultados (Legacy JSON store)
-CONSECUTIVOS_ESTADOS_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".consecutivos_estados.json")
-
-def load_estados():
-    """Carga estados guardados desde archivo."""
-    if os.path.exists(CONSECUTIVOS_ESTADOS_FILE):
-        try:
-            with open(CONSECUTIVOS_ESTADOS_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Error cargando estados: {e}")
-    return {}
-
-def save_estados(estados):
-    """Guarda estados en archivo."""
-    try:
-        with open(CONSECUTIVOS_ESTADOS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(estados, f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        print(f"Error guardando estados: {e}")
-
-# Cargar estados en memoria
-CONSECUTIVOS_ESTADOS = load_estados()
+from services import estados_bolivar
 
 async def update_recent_estados_background():
     """
     Actualiza estados de los últimos 3 meses de forma dinámica.
     """
-    global CONSECUTIVOS_ESTADOS
-    
     try:
         print("[AUTO-UPDATE] Iniciando actualización automática (Últimos 3 meses)...")
         df = get_consecutivos_pendientes_dataframe()
@@ -44,37 +18,26 @@ async def update_recent_estados_background():
         today = datetime.now()
         start_date = today - timedelta(days=90) # Aprox 3 meses
         
-        def is_recent(row):
-            try:
-                y = int(row['AÑO'])
-                m = int(row['MES'])
-                # Crear fecha (primer día del mes)
-                d = datetime(year=y, month=m, day=1)
-                return d >= start_date.replace(day=1)
-            except:
-                return False
-
-        # Aplicar filtro
-        df_recent = df[df.apply(is_recent, axis=1)]
+        # Filtro vectorizado por AÑO/MES
+        df_recent = df[consecutivos_recent_mask(df, start_date)]
         
         print(f"[AUTO-UPDATE] Registros recientes encontrados: {len(df_recent)}")
         
         count = 0
         total_attempts = 0
         
-        for _, row in df_recent.iterrows():
-            consecutivo = str(row['Consecutivo'])
+        for consecutivo in df_recent['Consecutivo'].tolist():
             if consecutivo and consecutivo != '0':
                 # Solo actualizar si no existe o está vacío
-                if consecutivo not in CONSECUTIVOS_ESTADOS or not CONSECUTIVOS_ESTADOS[consecutivo]:
+                if not estados_bolivar.has_estado(consecutivo):
                     try:
                         estado = consultar_estado_consecutivo(consecutivo)
-                        CONSECUTIVOS_ESTADOS[consecutivo] = estado
+                        estados_bolivar.set_estado(consecutivo, estado)
                         count += 1
                         
                         # Guardar cada 10 consultas
                         if count % 10 == 0:
-                            save_estados(CONSECUTIVOS_ESTADOS)
+                            estados_bolivar.persist()
                             print(f"[AUTO-UPDATE] Progreso: {count} consecutivos actualizados")
                             await asyncio.sleep(0.5)  # Pausa respetuosa
                     except Exception as e:
@@ -85,7 +48,7 @@ async def update_recent_estados_background():
                     await asyncio.sleep(0.1)
         
         # Guardar estados finales
-        save_estados(CONSECUTIVOS_ESTADOS)
+        estados_bolivar.persist()
         print(f"[AUTO-UPDATE] Completado: {count} nuevos estados actualizados")
         
     except Exception as e:
@@ -117,42 +80,23 @@ async def update_consecutivos_for_month_task(month: str, year: int):
     """
     Actualiza estados para un mes y año específicos (accionado manualmente).
     """
-    global CONSECUTIVOS_ESTADOS
-    
     try:
         print(f"[MANUAL-UPDATE] Iniciando actualización para {month} {year}...")
         df = get_consecutivos_pendientes_dataframe()
         
-        # Mapeo de meses para filtro
-        month_map = {
-            'ENERO': 1, 'FEBRERO': 2, 'MARZO': 3, 'ABRIL': 4, 'MAYO': 5, 'JUNIO': 6,
-            'JULIO': 7, 'AGOSTO': 8, 'SEPTIEMBRE': 9, 'OCTUBRE': 10, 'NOVIEMBRE': 11, 'DICIEMBRE': 12,
-            'ENE': 1, 'FEB': 2, 'MAR': 3, 'ABR': 4, 'MAY': 5, 'JUN': 6,
-            'JUL': 7, 'AGO': 8, 'SEP': 9, 'OCT': 10, 'NOV': 11, 'DIC': 12
-        }
-        
-        target_month_num = month_map.get(month.upper())
+        target_month_num = parse_month_name(month)
         if not target_month_num:
              print(f"[MANUAL-UPDATE] Error: Mes inválido {month}")
              return
 
-        def is_target_month(row):
-            try:
-                y = int(row['AÑO'])
-                m = int(row['MES'])
-                return y == year and m == target_month_num
-            except:
-                return False
-
-        # Aplicar filtro
-        df_target = df[df.apply(is_target_month, axis=1)]
+        # Filtro vectorizado por AÑO/MES
+        df_target = df[consecutivos_month_mask(df, year, target_month_num)]
         
         print(f"[MANUAL-UPDATE] Registros encontrados para {month} {year}: {len(df_target)}")
         
         count = 0
         
-        for _, row in df_target.iterrows():
-            consecutivo = str(row['Consecutivo'])
+        for consecutivo in df_target['Consecutivo'].tolist():
             if consecutivo and consecutivo != '0':
                  # Siempre actualizar en manual update, o solo si falta? 
                  # Usualmente manual force update intenta actualizar todo.
@@ -160,18 +104,18 @@ async def update_consecutivos_for_month_task(month: str, year: int):
                  # El usuario quiere "Actualizar", asumamos que quiere revisar todos.
                 try:
                     estado = consultar_estado_consecutivo(consecutivo)
-                    CONSECUTIVOS_ESTADOS[consecutivo] = estado
+                    estados_bolivar.set_estado(consecutivo, estado)
                     count += 1
                     
                     if count % 5 == 0:
-                        save_estados(CONSECUTIVOS_ESTADOS)
+                        estados_bolivar.persist()
                         await asyncio.sleep(0.5)
                 except Exception as e:
                     print(f"[MANUAL-UPDATE] Error {consecutivo}: {e}")
                 
                 await asyncio.sleep(0.2)
         
-        save_estados(CONSECUTIVOS_ESTADOS)
+        estados_bolivar.persist()
         print(f"[MANUAL-UPDATE] Finalizado. {count} estados actualizados.")
 
     except Exception as e:
@@ -1,7 +1,14 @@
+"""
+Servicio de Cancelaciones (hoja 'Cancelaciones IND' de SEGUIMIENTO CANCELACIONES).
+La hoja se procesa una vez por versión del Excel; los inputs del usuario son un
+overlay en memoria que se fusiona al serializar.
+"""
 import pandas as pd
 import os
-import json
-from datetime import datetime
+import threading
+from services import data_versions
+from services.journal_store import JournalStore
+from services.canonical import canonical_records
 
 # Archivo de persistencia de inputs del usuario
 CANCELACIONES_INPUTS_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "cancelaciones_inputs.json")
@@ -10,21 +17,27 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 EXCEL_FILE = os.path.join(BASE_DIR, "SEGUIMIENTO CANCELACIONES 2025 (1) (1).xlsx")
 SHEET_NAME = "Cancelaciones IND"
 
+# Versiones: archivo Excel (fuente) e inputs del usuario (overlay)
+CANCELACIONES = 'cancelaciones'
+CANCELACIONES_INPUTS = 'cancelaciones_inputs'
+
+# Inputs del usuario: journal (un registro por edición) + snapshot compactado
+_inputs_store = JournalStore(CANCELACIONES_INPUTS_FILE, CANCELACIONES_INPUTS)
+
+# Hoja procesada (registros base + posiciones por póliza) de la última versión del Excel
+_base_cache = {'base': None}
+_base_lock = threading.Lock()
+
 def load_user_inputs():
-    """Carga los inputs guardados por el usuario (estado actual, causal sages)."""
-    if os.path.exists(CANCELACIONES_INPUTS_FILE):
-        try:
-            with open(CANCELACIONES_INPUTS_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Error loading inputs: {e}")
-    return {}
+    """Inputs guardados por el usuario (estado actual, causal sages), desde memoria."""
+    return _inputs_store.all()
 
-def save_user_inputs(inputs):
-    """Guarda los inputs del usuario en JSON."""
-    os.makedirs(os.path.dirname(CANCELACIONES_INPUTS_FILE), exist_ok=True)
-    with open(CANCELACIONES_INPUTS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(inputs, f, ensure_ascii=False, indent=2)
+def get_cancelaciones_source_version():
+    """Versión del Excel de cancelaciones (mtime) sin leerlo."""
+    try:
+        return os.stat(EXCEL_FILE).st_mtime
+    except OSError:
+        return None
 
 def calculate_regional(sucursal: str):
     """
@@ -76,73 +89,71 @@ def calculate_regional(sucursal: str):
         
     return "OTRA"
 
-def get_cancelaciones_data():
-    """
-    Lee el archivo excel y fusiona con los inputs del usuario.
-    """
-    if not os.path.exists(EXCEL_FILE):
-        raise FileNotFoundError(f"No se encuentra el archivo: {EXCEL_FILE}")
-
-    # Leer Excel
-    # Usar header=0 para que la primera fila sea cabecera
+def _build_base(mtime) -> dict:
+    """Lee la hoja una vez: registros JSON-safe con REGIONAL y ESTADO_ACTUAL por defecto."""
+    print(f"[CANCELACIONES] Reading: {EXCEL_FILE}")
     df = pd.read_excel(EXCEL_FILE, sheet_name=SHEET_NAME)
-    
     # Limpiar nombres de columnas (eliminar espacios extra si los hay)
     df.columns = [c.strip() if isinstance(c, str) else c for c in df.columns]
 
-    # Convertir a lista de dicts
-    records = df.to_dict('records')
-    
-    # Cargar inputs guardados
-    user_inputs = load_user_inputs()
-    
-    # Procesar y fusionar
-    processed_data = []
-    
-    for record in records:
-        # Limpiar NaN
-        clean_record = {}
-        for k, v in record.items():
-            if pd.isna(v):
-                clean_record[k] = ""
-            elif isinstance(v, datetime):
-                clean_record[k] = v.isoformat()
-            else:
-                clean_record[k] = v
-        
-        # Calcular Regional basada en Sucursal
-        sucursal = str(clean_record.get('SUCURSAL', '')).strip()
-        clean_record['REGIONAL'] = calculate_regional(sucursal)
+    # Regional calculada una vez por sucursal distinta, no por fila
+    if 'SUCURSAL' in df.columns:
+        sucursal = df['SUCURSAL'].where(df['SUCURSAL'].notna(), '').astype(str).str.strip()
+    else:
+        sucursal = pd.Series('', index=df.index)
+    df['REGIONAL'] = sucursal.map({s: calculate_regional(s) for s in sucursal.unique()})
+    df['ESTADO_ACTUAL'] = 'Pendiente'
 
+    # Lista de dicts JSON-safe (vacíos -> "" como espera la vista)
+    records = canonical_records(df, null="")
+    # Clave única: NUMERO_POLIZA (string) -> posiciones, para aplicar el overlay
+    positions = {}
+    for pos, record in enumerate(records):
+        positions.setdefault(str(record.get('NUMERO_POLIZA', '')), []).append(pos)
 
-                
-        # Clave única: NUMERO_POLIZA (convertir a string para consistencia)
-        policy_id = str(clean_record.get('NUMERO_POLIZA', ''))
-        
-        # Inyectar datos del usuario si existen
-        if policy_id in user_inputs:
-            user_data = user_inputs[policy_id]
-            clean_record['ESTADO_ACTUAL'] = user_data.get('estado_actual', '')
-            # Sobrescribir Causal Sages si existe en user_inputs
-            if 'causal_sages' in user_data:
-                clean_record['CAUSAL SAGES MANAGEMENT'] = user_data['causal_sages']
-        else:
-             clean_record['ESTADO_ACTUAL'] = 'Pendiente' # Default
+    data_versions.bump_version(CANCELACIONES)
+    return {'records': records, 'positions': positions, 'mtime': mtime}
 
-        processed_data.append(clean_record)
-        
-    return processed_data
+def get_cancelaciones_base() -> dict:
+    """{records, positions} de la hoja sin inputs del usuario; se relee solo si el Excel cambia."""
+    mtime = get_cancelaciones_source_version()
+    if mtime is None:
+        raise FileNotFoundError(f"No se encuentra el archivo: {EXCEL_FILE}")
+    base = _base_cache['base']
+    if base is not None and base['mtime'] == mtime:
+        return base
+    with _base_lock:
+        base = _base_cache['base']
+        if base is None or base['mtime'] != mtime:
+            base = _base_cache['base'] = _build_base(mtime)
+        return base
+
+def apply_user_inputs(record: dict, user_data) -> dict:
+    """Copia del registro con los inputs del usuario aplicados (el registro base no se modifica)."""
+    if not user_data:
+        return record
+    merged = dict(record)
+    merged['ESTADO_ACTUAL'] = user_data.get('estado_actual', '')
+    # Sobrescribir Causal Sages si existe en user_inputs
+    if 'causal_sages' in user_data:
+        merged['CAUSAL SAGES MANAGEMENT'] = user_data['causal_sages']
+    return merged
+
+def get_cancelaciones_data():
+    """
+    Registros de cancelaciones con los inputs del usuario fusionados.
+    La hoja viene de la caché; solo se copian las filas con inputs.
+    """
+    base = get_cancelaciones_base()
+    records = list(base['records'])
+    positions = base['positions']
+    for policy_id, user_data in list(load_user_inputs().items()):
+        for pos in positions.get(policy_id, ()):
+            records[pos] = apply_user_inputs(records[pos], user_data)
+    return records
 
 def update_cancelacion(policy_id: str, field: str, value: str):
     """
     Actualiza un campo (estado_actual o causal_sages) para una poliza.
     """
-    user_inputs = load_user_inputs()
-    
-    if policy_id not in user_inputs:
-        user_inputs[policy_id] = {}
-        
-    user_inputs[policy_id][field] = value
-    
-    save_user_inputs(user_inputs)
-    return user_inputs[policy_id]
+    return _inputs_store.update(policy_id, lambda current: {**(current or {}), field: value})
@@ -0,0 +1,57 @@
+"""
+Capa de valores canónicos JSON-safe, aplicada una sola vez al cargar cada dataset:
+nulos tipados (None o el valor nulo que espera la vista), fechas ISO y floats
+finitos. Así los endpoints serializan los registros tal cual, sin recorrer cada
+celda en cada request.
+"""
+import math
+from datetime import date, datetime, time
+
+import numpy as np
+import pandas as pd
+
+ISO_DATETIME = '%Y-%m-%dT%H:%M:%S'
+ISO_DATE = '%Y-%m-%d'
+
+def canonical_value(value, null=None, date_format=ISO_DATETIME):
+    """Normaliza un valor suelto (celdas de columnas object)."""
+    if value is None or value is pd.NaT:
+        return null
+    if isinstance(value, (float, np.floating)):
+        value = float(value)
+        return value if math.isfinite(value) else null
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    if isinstance(value, (datetime, date)):
+        return value.strftime(date_format) if date_format else value.isoformat()
+    if isinstance(value, time):
+        return value.isoformat()
+    return value
+
+def _canonical_column(series, null, date_format):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        if date_format == ISO_DATETIME:
+            # strftime con 'T' no usa la ruta rápida de pandas; se formatea con espacio y se reemplaza
+            formatted = series.dt.strftime('%Y-%m-%d %H:%M:%S').str.replace(' ', 'T', regex=False).astype(object)
+        else:
+            formatted = series.dt.strftime(date_format).astype(object)
+        return formatted.where(series.notna(), null).tolist()
+    if pd.api.types.is_float_dtype(series):
+        values = series.to_numpy(dtype='float64')
+        result = values.astype(object)
+        result[~np.isfinite(values)] = null
+        return result.tolist()
+    if pd.api.types.is_integer_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return series.tolist()
+    return [canonical_value(v, null, date_format) for v in series.tolist()]
+
+def canonical_records(df, null=None, date_format=ISO_DATETIME) -> list:
+    """
+    DataFrame -> lista de registros JSON-safe, normalizando columna por columna
+    (vectorizado para fechas/floats/enteros; solo las columnas object se revisan por celda).
+    """
+    columns = [str(c) if not isinstance(c, str) else c for c in df.columns]
+    values = [_canonical_column(df.iloc[:, i], null, date_format) for i in range(df.shape[1])]
+    return [dict(zip(columns, row)) for row in zip(*values)]
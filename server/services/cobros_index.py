@@ -0,0 +1,212 @@
+"""
+Grupos de Cobros (pólizas pendientes por RESPONSABLE) mantenidos de forma incremental.
+Se construyen una vez por generación del snapshot / versión del mapeo de responsables
+y se actualizan con cada cambio del overlay de estados, sin recorrer todos los registros.
+"""
+import json
+import os
+import threading
+from datetime import date
+
+from services.state_overlay import get_final_state_overlay, add_listener, PENDIENTE
+from services.unified_data_processor import clean_currency_value
+
+RESPONSABLES_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'responsables_mapping.json')
+DEFAULT_RESPONSABLE = 'SIN ASIGNAR'
+SORT_KEYS = ('prima', 'age')
+
+_lock = threading.Lock()
+_state = {'index': None}
+
+def mapping_stamp():
+    """Marca (mtime, tamaño) del mapeo de responsables, o None si no existe."""
+    try:
+        st = os.stat(RESPONSABLES_FILE)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+def _load_mapping():
+    if not os.path.exists(RESPONSABLES_FILE):
+        return {}
+    with open(RESPONSABLES_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def fecha_ordinal(fecha_iso):
+    """Fecha ISO (YYYY-MM-DD...) -> ordinal de días, o None."""
+    if not fecha_iso or not isinstance(fecha_iso, str):
+        return None
+    try:
+        return date.fromisoformat(fecha_iso[:10]).toordinal()
+    except ValueError:
+        return None
+
+def record_value_usd(record) -> float:
+    val = record.get('PRIMA_TOTAL_USD', 0) or record.get('PRIMA_SIN_IVA_USD', 0)
+    return clean_currency_value(val)
+
+class CobrosIndex:
+    """Pendientes agrupados REGIONAL -> responsable, con totales mantenidos en O(1) por cambio."""
+
+    def __init__(self, overlay, mapping, mapping_stamp):
+        self.overlay = overlay
+        self.mapping = mapping
+        self.mapping_stamp = mapping_stamp
+        self.dirty = False
+
+        todos = overlay.todos
+        self.values = [record_value_usd(r) for r in todos]
+        self.fechas = [fecha_ordinal(r.get('FECHA_EXPEDICION')) for r in todos]
+        self.responsable_of = []
+        self.groups = {}
+        for pos, record in enumerate(todos):
+            regional = record.get('REGIONAL', 'SIN REGIONAL')
+            self.responsable_of.append(mapping.get(regional, DEFAULT_RESPONSABLE))
+            if overlay.codes[pos] == PENDIENTE:
+                self._add(pos)
+
+    def _group(self, responsable):
+        group = self.groups.get(responsable)
+        if group is None:
+            group = self.groups[responsable] = {
+                'items': set(), 'total_usd': 0.0, 'regionales': {}, 'sorted': {}
+            }
+        return group
+
+    def _add(self, pos):
+        group = self._group(self.responsable_of[pos])
+        if pos in group['items']:
+            return
+        group['items'].add(pos)
+        group['total_usd'] += self.values[pos]
+        regional = self.overlay.todos[pos].get('REGIONAL', 'SIN REGIONAL')
+        reg = group['regionales'].setdefault(regional, {'count': 0, 'total_usd': 0.0})
+        reg['count'] += 1
+        reg['total_usd'] += self.values[pos]
+        group['sorted'].clear()
+
+    def _remove(self, pos):
+        group = self.groups.get(self.responsable_of[pos])
+        if group is None or pos not in group['items']:
+            return
+        group['items'].discard(pos)
+        group['total_usd'] -= self.values[pos]
+        regional = self.overlay.todos[pos].get('REGIONAL', 'SIN REGIONAL')
+        reg = group['regionales'][regional]
+        reg['count'] -= 1
+        reg['total_usd'] -= self.values[pos]
+        if reg['count'] == 0:
+            del group['regionales'][regional]
+        group['sorted'].clear()
+
+    def apply(self, changes):
+        """Aplica [(pos, viejo, nuevo)] del overlay moviendo filas dentro/fuera de pendientes."""
+        for pos, _, new in changes:
+            if new == PENDIENTE:
+                self._add(pos)
+            else:
+                self._remove(pos)
+
+    def summaries(self) -> list:
+        result = []
+        for responsable, group in self.groups.items():
+            if not group['items']:
+                continue
+            result.append({
+                'responsable': responsable,
+                'count': len(group['items']),
+                'total_usd': group['total_usd'],
+                'regionales': [
+                    {'regional': regional, 'count': r['count'], 'total_usd': r['total_usd']}
+                    for regional, r in sorted(group['regionales'].items(), key=lambda kv: -kv[1]['total_usd'])
+                ],
+            })
+        result.sort(key=lambda g: g['total_usd'], reverse=True)
+        return result
+
+    def sorted_items(self, responsable, sort):
+        """Posiciones del grupo ordenadas (mayor prima primero / más antiguas primero)."""
+        group = self.groups.get(responsable)
+        if group is None:
+            return []
+        cached = group['sorted'].get(sort)
+        if cached is None:
+            if sort == 'age':
+                missing = date.max.toordinal()
+                cached = sorted(group['items'], key=lambda p: (self.fechas[p] or missing, p))
+            else:
+                cached = sorted(group['items'], key=lambda p: (-self.values[p], p))
+            group['sorted'][sort] = cached
+        return cached
+
+def _on_overlay_change(overlay, changes):
+    with _lock:
+        index = _state['index']
+        if index is None or index.overlay is not overlay:
+            return
+        if changes is None:
+            index.dirty = True
+        else:
+            index.apply(changes)
+
+add_listener(_on_overlay_change)
+
+def get_cobros_index() -> CobrosIndex:
+    """Índice vigente; se reconstruye solo si cambió el snapshot o el mapeo de responsables."""
+    overlay = get_final_state_overlay()
+    stamp = mapping_stamp()
+    index = _state['index']
+    if index is None or index.overlay is not overlay or index.mapping_stamp != stamp or index.dirty:
+        with _lock:
+            index = _state['index']
+            if index is None or index.overlay is not overlay or index.mapping_stamp != stamp or index.dirty:
+                index = CobrosIndex(overlay, _load_mapping(), stamp)
+                _state['index'] = index
+    return index
+
+def get_cobros_summary() -> dict:
+    """Resumen por responsable (sin items)."""
+    index = get_cobros_index()
+    with _lock:
+        groups = index.summaries()
+    return {
+        'data': groups,
+        'total_global_usd': sum(g['total_usd'] for g in groups),
+        'total_count': sum(g['count'] for g in groups),
+    }
+
+def get_cobros_items(responsable: str, page: int = 1, page_size: int = 50, sort: str = 'prima') -> dict:
+    """Página de pólizas pendientes de un responsable, ordenada por prima o antigüedad."""
+    if sort not in SORT_KEYS:
+        raise ValueError(f"Orden inválido: {sort}. Use {', '.join(SORT_KEYS)}")
+    index = get_cobros_index()
+    with _lock:
+        positions = index.sorted_items(responsable, sort)
+        total = len(positions)
+        start = (page - 1) * page_size
+        page_positions = positions[start:start + page_size]
+
+    today = date.today().toordinal()
+    items = []
+    for pos in page_positions:
+        record = index.overlay.todos[pos]
+        fecha = index.fechas[pos]
+        items.append({
+            **record,
+            'NUMERO_POLIZA': record.get('POLIZA'),
+            'SUCURSAL': record.get('LOCALIDAD'),
+            'FECHA': record.get('FECHA_EXPEDICION'),
+            'valor_usd': index.values[pos],
+            'dias_mora': (today - fecha) if fecha is not None else None,
+        })
+
+    return {
+        'responsable': responsable,
+        'data': items,
+        'pagination': {
+            'page': page,
+            'page_size': page_size,
+            'total': total,
+            'total_pages': (total + page_size - 1) // page_size
+        }
+    }
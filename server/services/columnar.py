@@ -0,0 +1,171 @@
+"""
+Formato de respuesta por columnas (format=columns): una lista de nombres de columna
+y un arreglo de valores por columna, con las columnas de texto repetitivas
+codificadas como diccionario + códigos. Las tablas se construyen una vez por
+generación del snapshot; cada request solo selecciona posiciones, sin crear un
+dict por fila. La tabla de 'todos' es una vista sobre get_todos_dataframe: las
+columnas category usan sus categorías y códigos, sin una segunda copia; las
+numéricas que el DataFrame coerciona (AÑO, MES, PRIMA_*) salen de los registros
+originales, así ambos formatos llevan los mismos valores.
+"""
+import numpy as np
+import pandas as pd
+
+from services.unified_data_processor import (
+    get_snapshot_derived, get_todos_dataframe, parse_month_name, CATEGORICAL_COLUMNS, COERCED_COLUMNS
+)
+
+FORMATS = ('rows', 'columns')
+
+class ColumnarTable:
+    """Columnas de una lista de registros: texto repetitivo -> (diccionario, códigos); resto -> arreglo."""
+
+    def __init__(self, records, categorical=CATEGORICAL_COLUMNS):
+        self.length = len(records)
+        self.columns = []
+        seen = set()
+        for record in records:
+            for key in record:
+                if key not in seen:
+                    seen.add(key)
+                    self.columns.append(key)
+
+        self.values = {}        # columna -> np.ndarray(object)
+        self.dictionaries = {}  # columna -> (lista de valores, np.ndarray(int32) de códigos, -1 = null)
+        for col in self.columns:
+            column = [r.get(col) for r in records]
+            if col in categorical or self._is_repetitive(column):
+                self.dictionaries[col] = self._encode(column)
+            else:
+                arr = np.empty(self.length, dtype=object)
+                arr[:] = column
+                self.values[col] = arr
+
+    @classmethod
+    def from_dataframe(cls, df, records=None, raw_columns=()):
+        """
+        Vista sobre un DataFrame: category -> (categorías, códigos); resto -> arreglo de la columna.
+        raw_columns se toman de records (alineados con df) en vez del DataFrame, para las
+        columnas que el DataFrame coerciona (nulos -> 0) y así conservar los valores originales.
+        """
+        table = cls.__new__(cls)
+        table.length = len(df)
+        table.columns = list(df.columns)
+        table.values = {}
+        table.dictionaries = {}
+        for col in table.columns:
+            series = df[col]
+            if col in raw_columns and records is not None:
+                arr = np.empty(table.length, dtype=object)
+                arr[:] = [r.get(col) for r in records]
+                table.values[col] = arr
+            elif isinstance(series.dtype, pd.CategoricalDtype):
+                table.dictionaries[col] = (series.cat.categories.tolist(), series.cat.codes.to_numpy())
+            else:
+                table.values[col] = _column_values(series)
+        return table
+
+    def _is_repetitive(self, column) -> bool:
+        if not all(v is None or isinstance(v, str) for v in column):
+            return False
+        distinct = set(column)
+        distinct.discard(None)
+        return len(distinct) <= max(1, self.length // 4)
+
+    @staticmethod
+    def _encode(column):
+        dictionary = []
+        index = {}
+        codes = np.empty(len(column), dtype=np.int32)
+        for i, value in enumerate(column):
+            if value is None:
+                codes[i] = -1
+                continue
+            code = index.get(value)
+            if code is None:
+                code = index[value] = len(dictionary)
+                dictionary.append(value)
+            codes[i] = code
+        return dictionary, codes
+
+    def column_array(self, col):
+        """Valores de una columna (decodificados) como arreglo numpy, para filtrar."""
+        if col in self.values:
+            return self.values[col]
+        dictionary, codes = self.dictionaries[col]
+        lookup = np.empty(len(dictionary) + 1, dtype=object)
+        lookup[:-1] = dictionary
+        lookup[-1] = None
+        return lookup[codes]
+
+    def column_values(self, col, positions) -> list:
+        """Valores decodificados (lista Python) de una columna para las posiciones dadas (null si no existe)."""
+        if col not in self.values and col not in self.dictionaries:
+            return [None] * len(np.arange(self.length)[positions])
+        if col in self.values:
+            return self.values[col][positions].tolist()
+        dictionary, codes = self.dictionaries[col]
+        return [dictionary[c] if c >= 0 else None for c in codes[positions].tolist()]
+
+    def to_payload(self, positions=None, columns=None) -> dict:
+        """
+        {'columns': [...], 'row_count': n, 'data': {col: [valores] | {'dictionary': [...], 'codes': [...]}}}
+        positions: arreglo/slice de filas a incluir (todas si es None).
+        Columnas pedidas que no existen se retornan con null, igual que project() en filas.
+        """
+        if positions is None:
+            positions = slice(None)
+        columns = list(columns or self.columns)
+        row_count = len(np.arange(self.length)[positions])
+        data = {}
+        for col in columns:
+            if col not in self.values and col not in self.dictionaries:
+                data[col] = [None] * row_count
+                continue
+            if col in self.dictionaries:
+                dictionary, codes = self.dictionaries[col]
+                selected = codes[positions]
+                # Solo las entradas del diccionario usadas en esta selección
+                used = np.unique(selected[selected >= 0])
+                remap = np.full(len(dictionary) + 1, -1, dtype=np.int32)
+                remap[used] = np.arange(len(used), dtype=np.int32)
+                data[col] = {
+                    'dictionary': [dictionary[i] for i in used.tolist()],
+                    'codes': remap[selected].tolist(),
+                }
+            else:
+                data[col] = self.values[col][positions].tolist()
+        return {'format': 'columns', 'columns': columns, 'row_count': row_count, 'data': data}
+
+def _column_values(series):
+    """Arreglo de la columna sin copiar si es posible; los nulos (NaN/NA) pasan a None."""
+    if series.dtype.kind in 'biu' or (series.dtype.kind == 'f' and not series.hasnans):
+        return series.to_numpy()
+    if series.dtype == object and not series.hasnans:
+        return series.to_numpy()
+    return series.to_numpy(dtype=object, na_value=None)
+
+def get_todos_columns() -> ColumnarTable:
+    """Tabla por columnas de 'todos' (REPORTE) sobre el DataFrame del snapshot, una vez por generación."""
+    return get_snapshot_derived('todos_columns', lambda cache: ColumnarTable.from_dataframe(
+        get_todos_dataframe(), cache.get('todos') or [], COERCED_COLUMNS))
+
+def get_negocios_columns() -> ColumnarTable:
+    """Tabla por columnas de 'negocios_nuevos' (Detalle), una vez por generación."""
+    return get_snapshot_derived('negocios_columns', lambda cache: ColumnarTable(cache.get('negocios_nuevos') or []))
+
+def get_negocios_columns_by_month(year, month_name, columns=None) -> dict:
+    """Equivalente por columnas de get_negocios_nuevos_by_month."""
+    table = get_negocios_columns()
+    month_num = parse_month_name(month_name)
+    if not month_num or not table.length:
+        return table.to_payload(np.empty(0, dtype=np.int64), columns)
+    mask = (table.column_array('AÑO') == int(year)) & (table.column_array('MES') == month_num)
+    return table.to_payload(np.flatnonzero(mask), columns)
+
+def get_todos_columns_page(page=1, page_size=100, columns=None) -> dict:
+    """Equivalente por columnas de get_all_records_paginated (más recientes primero)."""
+    table = get_todos_columns()
+    start = (page - 1) * page_size
+    positions = np.arange(table.length - 1, -1, -1)[start:start + page_size]
+    return table.to_payload(positions, columns)
@@ -0,0 +1,126 @@
+"""
+Middleware ASGI de compresión: negocia brotli (si está instalado) o gzip según
+Accept-Encoding y solo comprime respuestas por encima de un tamaño mínimo.
+Las respuestas en streaming se comprimen por bloques (flush por bloque) para que
+el cliente siga recibiendo datos a medida que se generan.
+"""
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MINIMUM_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4   # buen balance velocidad/tamaño para respuestas dinámicas
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/')
+
+def choose_encoding(accept_encoding: str):
+    """Retorna 'br', 'gzip' o None según Accept-Encoding (respetando q=0)."""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        token, _, params = part.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if token:
+            accepted[token.strip().lower()] = q
+    if brotli is not None and accepted.get('br', 0) > 0:
+        return 'br'
+    if accepted.get('gzip', 0) > 0:
+        return 'gzip'
+    return None
+
+class _Compressor:
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._br = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._gz = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == 'br':
+            return self._br.process(data) + self._br.flush()
+        return self._gz.compress(data) + self._gz.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b'') -> bytes:
+        if self.encoding == 'br':
+            return self._br.process(data) + self._br.finish()
+        return self._gz.compress(data) + self._gz.flush()
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get('accept-encoding'))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingSender(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+class _CompressingSender:
+    def __init__(self, send, encoding, minimum_size):
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start = None
+        self.compressor = None
+        self.passthrough = False
+
+    def _should_compress(self, headers, body, more_body):
+        if self.start['status'] in (204, 304) or 'content-encoding' in headers:
+            return False
+        if not headers.get('content-type', '').startswith(COMPRESSIBLE_TYPES):
+            return False
+        # Respuestas completas pequeñas no compensan el costo
+        return more_body or len(body) >= self.minimum_size
+
+    async def send(self, message):
+        if message['type'] == 'http.response.start':
+            self.start = message
+            return
+        if message['type'] != 'http.response.body' or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+
+        if self.compressor is None:
+            headers = MutableHeaders(raw=self.start['headers'])
+            if not self._should_compress(headers, body, more_body):
+                self.passthrough = True
+                await self._send(self.start)
+                await self._send(message)
+                return
+            self.compressor = _Compressor(self.encoding)
+            headers['Content-Encoding'] = self.encoding
+            headers.add_vary_header('Accept-Encoding')
+            if more_body:
+                del headers['Content-Length']
+                data = self.compressor.chunk(body)
+            else:
+                data = self.compressor.finish(body)
+                headers['Content-Length'] = str(len(data))
+            self.start['headers'] = headers.raw
+            await self._send(self.start)
+            await self._send({'type': 'http.response.body', 'body': data, 'more_body': more_body})
+            return
+
+        data = self.compressor.chunk(body) if more_body else self.compressor.finish(body)
+        await self._send({'type': 'http.response.body', 'body': data, 'more_body': more_body})
@@ -0,0 +1,56 @@
+"""
+Índice primario CONSECUTIVO -> filas del snapshot unificado, construido una vez
+por generación. Permite resolver el detalle de un consecutivo (fila del Excel,
+estado guardado, estado Bolívar y primas guardadas) en tiempo constante.
+"""
+from services.search_index import normalize_policy_key
+from services.unified_data_processor import get_snapshot_derived, get_all_records
+
+def _build_consecutivo_index(cache):
+    primary = {}
+    aliases = {}
+    for pos, record in enumerate(cache.get('todos') or []):
+        consecutivo = str(record.get('CONSECUTIVO', '')).strip()
+        if not consecutivo or consecutivo.lower() in ('nan', 'none'):
+            continue
+        primary.setdefault(consecutivo, []).append(pos)
+        aliases.setdefault(normalize_policy_key(consecutivo), consecutivo)
+    return {'primary': primary, 'aliases': aliases}
+
+def get_consecutivo_index() -> dict:
+    """Índice {'primary': consecutivo -> [posiciones], 'aliases': clave normalizada -> consecutivo}."""
+    return get_snapshot_derived('consecutivo_index', _build_consecutivo_index)
+
+def resolve_consecutivo(consecutivo_id: str):
+    """Retorna (consecutivo tal como está en el snapshot, posiciones) o (None, [])."""
+    index = get_consecutivo_index()
+    key = str(consecutivo_id).strip()
+    if key not in index['primary']:
+        key = index['aliases'].get(normalize_policy_key(key))
+    if not key:
+        return None, []
+    return key, index['primary'].get(key, [])
+
+def get_consecutivo_detail(consecutivo_id: str) -> dict:
+    """Fusiona fila(s) del Excel, estado guardado, estado Bolívar y primas guardadas."""
+    from services.policy_state_manager import policy_state_manager
+    from services.estados_bolivar import get_estado
+    from services.consecutivos_primas_service import get_primas_for_consecutivo
+
+    consecutivo, positions = resolve_consecutivo(consecutivo_id)
+    if consecutivo is None:
+        return {'consecutivo': str(consecutivo_id).strip(), 'found': False}
+
+    todos = get_all_records()
+    return {
+        'consecutivo': consecutivo,
+        'found': True,
+        'records': [todos[p] for p in positions],
+        'policy_state': policy_state_manager.get_state(consecutivo),
+        'estado_bolivar': get_estado(consecutivo),
+        'primas': get_primas_for_consecutivo(consecutivo),
+    }
+
+def get_consecutivos_details(consecutivo_ids: list) -> dict:
+    """Versión por lotes: {id solicitado: detalle}."""
+    return {str(c): get_consecutivo_detail(c) for c in consecutivo_ids}
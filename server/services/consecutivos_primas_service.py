@@ -0,0 +1,59 @@
+"""
+Primas ingresadas manualmente para consecutivos (consecutivos_primas.json).
+Estructura: {"Consecutivos: DIC 2025": {"<consecutivo>": prima, ...}, ...}
+Persistidas con JournalStore: guardar una hoja agrega un registro al journal.
+"""
+import os
+import threading
+
+from services import data_versions
+from services.journal_store import JournalStore
+
+CONSECUTIVOS_PRIMA_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "consecutivos_primas.json")
+
+_store = JournalStore(CONSECUTIVOS_PRIMA_FILE, data_versions.CONSECUTIVOS_PRIMAS)
+_index = {'by_consecutivo': None}
+_lock = threading.Lock()
+
+def _index_sheet(index, sheet_name, primas):
+    for consecutivo, prima in (primas or {}).items():
+        index.setdefault(str(consecutivo).strip(), []).append({'sheet': sheet_name, 'prima': prima})
+
+def _unindex_sheet(index, sheet_name, primas):
+    for consecutivo in (primas or {}):
+        key = str(consecutivo).strip()
+        entries = [e for e in index.get(key, []) if e['sheet'] != sheet_name]
+        if entries:
+            index[key] = entries
+        else:
+            index.pop(key, None)
+
+def _get_index() -> dict:
+    """Índice inverso consecutivo -> [{sheet, prima}], construido una vez y parcheado al guardar."""
+    if _index['by_consecutivo'] is None:
+        with _lock:
+            if _index['by_consecutivo'] is None:
+                index = {}
+                for sheet_name, primas in _store.all().items():
+                    _index_sheet(index, sheet_name, primas)
+                _index['by_consecutivo'] = index
+    return _index['by_consecutivo']
+
+def load_all_primas() -> dict:
+    """Retorna todas las primas guardadas (desde memoria)."""
+    return _store.all()
+
+def get_sheet_primas(sheet_name: str) -> dict:
+    return _store.get(sheet_name) or {}
+
+def save_sheet_primas(sheet_name: str, primas: dict):
+    """Reemplaza las primas de una hoja (un registro en el journal)."""
+    index = _get_index()
+    with _lock:
+        _unindex_sheet(index, sheet_name, _store.get(sheet_name))
+        _index_sheet(index, sheet_name, primas)
+        _store.set(sheet_name, primas)
+
+def get_primas_for_consecutivo(consecutivo: str) -> list:
+    """Primas guardadas para un consecutivo (una por hoja), en O(1)."""
+    return _get_index().get(str(consecutivo).strip(), [])
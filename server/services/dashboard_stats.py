@@ -0,0 +1,111 @@
+"""
+Estadísticas del Dashboard por mes (conteos y USD por estado final, alertas de
+pendientes antiguos). Compartido por el endpoint del dashboard y los reportes XLSX.
+"""
+from datetime import datetime
+
+import pandas as pd
+
+from services.unified_data_processor import clean_currency_value
+from services.state_overlay import get_final_state_overlay, RECAUDADA, ANULADA
+from services.aging_index import get_pending_older_than
+
+def build_dashboard_stats(year: int, month: int) -> dict:
+    """Resumen de estados y USD de un mes, con alertas de pendientes > 20 días."""
+    # Obtener datos de detalle usando unificado (filas alineadas con el overlay de estados)
+    overlay = get_final_state_overlay()
+    all_data = overlay.todos
+    
+    if not all_data:
+         return {"success": False, "error": "No data available"}
+         
+    month_data = []
+    month_positions = []
+    
+    for pos, record in enumerate(all_data):
+        # Buscar fecha en varias columnas posibles
+        fecha_val = record.get('FECHA_EXPEDICION') or record.get('FECHA EXPEDICION NEGOCIO DIA-MES-AÑO') or record.get('FECHA EXPEDICION NEGOCIO')
+        
+        if not fecha_val:
+            continue
+            
+        fecha_dt = None
+        try:
+            if isinstance(fecha_val, str):
+                if 'T' in fecha_val:
+                    fecha_dt = datetime.fromisoformat(fecha_val)
+                else:
+                    for fmt in ["%Y-%m-%d", "%d/%m/%Y", "%Y/%m/%d"]:
+                        try:
+                            fecha_dt = datetime.strptime(fecha_val, fmt)
+                            break
+                        except:
+                            continue
+            elif isinstance(fecha_val, (datetime, pd.Timestamp)): # pd.Timestamp fix
+                 fecha_dt = fecha_val
+        except:
+            pass
+            
+        if fecha_dt:
+             r_year = fecha_dt.year
+             r_month = fecha_dt.month
+             if r_year == year and r_month == month:
+                 month_data.append(record)
+                 month_positions.append(pos)
+    
+    # Estado final precalculado (overlay alineado con el snapshot)
+    final_states = overlay.codes
+    
+    # Contar estados
+    pendientes = []
+    recaudadas = []
+    anuladas = []
+    
+    for pos, record in zip(month_positions, month_data):
+        code = final_states[pos]
+        if code == RECAUDADA:
+            recaudadas.append(record)
+        elif code == ANULADA:
+            anuladas.append(record)
+        else:
+            pendientes.append(record)
+    
+    def calculate_total_usd(records):
+        total = 0.0
+        for r in records:
+            val = r.get('PRIMA_TOTAL_USD', 0)
+            if val == 0:
+                 val = r.get('PRIMA_SIN_IVA_USD', 0)
+            total += clean_currency_value(val)
+        return total
+
+    total_usd_recaudadas = calculate_total_usd(recaudadas)
+    total_usd_pendientes = calculate_total_usd(pendientes)
+    total_usd_anuladas = calculate_total_usd(anuladas)
+    total_usd = total_usd_recaudadas + total_usd_pendientes + total_usd_anuladas
+    
+    efectividad_recaudo = round((total_usd_recaudadas / total_usd * 100), 1) if total_usd > 0 else 0
+
+    # Alertas de pendientes > 20 días (índice de antigüedad ordenado por fecha)
+    pendientes_20_dias = get_pending_older_than(20, year, month)
+    
+    return {
+        "success": True,
+        "year": year,
+        "month": month,
+        "summary": {
+            "total": len(month_data),
+            "pendientes": len(pendientes),
+            "recaudadas": len(recaudadas),
+            "anuladas": len(anuladas),
+            "total_usd_recaudadas": total_usd_recaudadas,
+            "total_usd_pendientes": total_usd_pendientes,
+            "total_usd_anuladas": total_usd_anuladas,
+            "recaudo_percentage_count": round((len(recaudadas) / len(month_data) * 100), 1) if month_data else 0,
+            "efectividad_recaudo": efectividad_recaudo
+        },
+        "alerts": {
+            "pendientes_20_dias_count": len(pendientes_20_dias),
+            "pendientes_20_dias_list": pendientes_20_dias
+        }
+    }
@@ -0,0 +1,72 @@
+"""
+Registro de versiones (generaciones) de los datos en memoria.
+Cada fuente (snapshot unificado, estados guardados, cancelaciones, etc.) tiene un
+contador que se incrementa cada vez que su contenido cambia, para que índices y
+cachés derivados sepan cuándo reconstruirse.
+"""
+import threading
+
+# Nombres de fuentes conocidas
+SNAPSHOT = 'snapshot'
+POLICY_STATES = 'policy_states'
+CONSECUTIVOS_ESTADOS = 'consecutivos_estados'
+FORECAST_METAS = 'forecast_metas'
+CONSECUTIVOS_PRIMAS = 'consecutivos_primas'
+
+_lock = threading.Lock()
+_versions = {}
+_listeners = {}
+_refreshers = {}
+
+def _refresh(name: str):
+    refresher = _refreshers.get(name)
+    if refresher is not None:
+        try:
+            refresher()
+        except Exception as e:
+            print(f"[VERSIONS] Error refrescando '{name}': {e}")
+
+def get_version(name: str, refresh: bool = True) -> int:
+    """Retorna la versión actual de una fuente (0 si nunca cambió)."""
+    if refresh:
+        _refresh(name)
+    return _versions.get(name, 0)
+
+def get_versions(*names, refresh: bool = True) -> tuple:
+    """
+    Retorna una tupla con las versiones de varias fuentes. refresh=False no ejecuta
+    los refrescadores (para leer con un lock tomado).
+    """
+    if refresh:
+        for name in names:
+            _refresh(name)
+    return tuple(_versions.get(n, 0) for n in names)
+
+def bump_version(name: str) -> int:
+    """Incrementa la versión de una fuente y notifica a los suscriptores."""
+    with _lock:
+        version = _versions.get(name, 0) + 1
+        _versions[name] = version
+        callbacks = list(_listeners.get(name, []))
+
+    for callback in callbacks:
+        try:
+            callback(name, version)
+        except Exception as e:
+            print(f"[VERSIONS] Error notificando cambio de '{name}': {e}")
+    return version
+
+def subscribe(name: str, callback):
+    """Registra un callback(name, version) que se ejecuta al cambiar la fuente."""
+    with _lock:
+        _listeners.setdefault(name, []).append(callback)
+
+def register_refresher(name: str, refresher):
+    """
+    Registra refresher() para fuentes que pueden cambiar fuera de este proceso
+    (p. ej. otra conexión a la base): se llama antes de leer su versión y debe
+    llamar bump_version si detecta cambios, sin tener locks propios tomados.
+    Quien lee versiones no debe tener locks tomados (o usar refresh=False).
+    """
+    with _lock:
+        _refreshers[name] = refresher
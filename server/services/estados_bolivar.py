@@ -0,0 +1,67 @@
+"""
+Overlay en memoria de los estados consultados a Bolívar (consecutivo -> estado).
+Las tareas en segundo plano lo actualizan directamente y cada cambio incrementa
+la versión CONSECUTIVOS_ESTADOS; los lectores fusionan el overlay al serializar,
+sin leer .consecutivos_estados.json ni modificar los dicts del snapshot.
+El archivo solo se usa para cargar al arrancar y para persistir.
+"""
+import json
+import os
+import threading
+
+from services import data_versions
+
+CONSECUTIVOS_ESTADOS_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".consecutivos_estados.json")
+
+_lock = threading.Lock()
+
+def _load() -> dict:
+    if os.path.exists(CONSECUTIVOS_ESTADOS_FILE):
+        try:
+            with open(CONSECUTIVOS_ESTADOS_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"[ESTADOS] Error cargando estados: {e}")
+    return {}
+
+_estados = _load()
+
+def get_estado(consecutivo):
+    """Estado Bolívar de un consecutivo, o None si no se ha consultado."""
+    return _estados.get(str(consecutivo).strip()) or None
+
+def has_estado(consecutivo) -> bool:
+    return bool(_estados.get(str(consecutivo).strip()))
+
+def set_estado(consecutivo, estado) -> int:
+    """Actualiza el overlay en memoria; incrementa la versión solo si el estado cambió."""
+    key = str(consecutivo).strip()
+    with _lock:
+        if _estados.get(key) == estado:
+            return data_versions.get_version(data_versions.CONSECUTIVOS_ESTADOS)
+        _estados[key] = estado
+    return data_versions.bump_version(data_versions.CONSECUTIVOS_ESTADOS)
+
+def persist():
+    """Guarda el overlay en disco (copia tomada bajo lock)."""
+    with _lock:
+        snapshot = dict(_estados)
+    try:
+        with open(CONSECUTIVOS_ESTADOS_FILE, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        print(f"[ESTADOS] Error guardando estados: {e}")
+
+def merge_estados(records, key='Consecutivo', field='Estado') -> list:
+    """
+    Registros con el estado Bolívar aplicado. Solo se copian los registros cuyo
+    estado cambia; el resto se retorna tal cual (los originales no se modifican).
+    """
+    merged = []
+    for record in records:
+        estado = _estados.get(str(record.get(key, '')).strip())
+        if estado and record.get(field) != estado:
+            record = dict(record)
+            record[field] = estado
+        merged.append(record)
+    return merged
@@ -0,0 +1,98 @@
+"""
+Exportación en streaming (NDJSON / CSV) de datasets completos.
+Las filas se generan por bloques desde las estructuras en memoria, así la memoria
+usada por la respuesta no crece con el número de filas y el primer bloque sale
+de inmediato.
+"""
+import csv
+import io
+from datetime import date
+
+from services.columnar import get_todos_columns
+from services.fast_json import dumps
+
+CHUNK_ROWS = 500
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+def _table_chunks(table, columns):
+    """Bloques de filas (tuplas) leídos por columnas desde una ColumnarTable."""
+    for start in range(0, table.length, CHUNK_ROWS):
+        positions = slice(start, min(start + CHUNK_ROWS, table.length))
+        yield list(zip(*[table.column_values(col, positions) for col in columns]))
+
+def _record_chunks(records, columns):
+    """Bloques de filas (tuplas) desde una lista de dicts."""
+    for start in range(0, len(records), CHUNK_ROWS):
+        yield [tuple(r.get(col) for col in columns) for r in records[start:start + CHUNK_ROWS]]
+
+def _record_columns(records):
+    columns = []
+    seen = set()
+    for record in records:
+        for key in record:
+            if key not in seen:
+                seen.add(key)
+                columns.append(key)
+    return columns
+
+def _ndjson(columns, chunks):
+    for rows in chunks:
+        yield b''.join(dumps(dict(zip(columns, row))) + b'\n' for row in rows)
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value != value:
+        return ''
+    return value
+
+def _csv(columns, chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM para que Excel detecte UTF-8 (tildes, Ñ)
+    buffer.write('\ufeff')
+    writer.writerow(columns)
+    yield buffer.getvalue().encode('utf-8')
+    for rows in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_value(v) for v in row] for row in rows)
+        yield buffer.getvalue().encode('utf-8')
+
+def _snapshot_source(fields):
+    table = get_todos_columns()
+    # Campos inexistentes salen vacíos, igual que en cancelaciones/renovaciones y format=columns
+    columns = list(fields) if fields else table.columns
+    return columns, _table_chunks(table, columns)
+
+def _cancelaciones_source(fields):
+    from services.cancelaciones_service import get_cancelaciones_data
+    records = get_cancelaciones_data()
+    columns = fields or _record_columns(records)
+    return columns, _record_chunks(records, columns)
+
+def _renewals_source(fields):
+    from services.renewals_service import load_renewals_data
+    records = load_renewals_data() or []
+    columns = fields or _record_columns(records)
+    return columns, _record_chunks(records, columns)
+
+DATASETS = {
+    'reporte': _snapshot_source,
+    'cancelaciones': _cancelaciones_source,
+    'renewals': _renewals_source,
+}
+
+def stream_dataset(dataset: str, fmt: str, fields=None):
+    """
+    Retorna (generador de bytes, media type, nombre de archivo) para un dataset.
+    Lanza KeyError si el dataset o el formato no existen.
+    """
+    media_type = EXPORT_FORMATS[fmt]
+    columns, chunks = DATASETS[dataset](fields)
+    body = _ndjson(columns, chunks) if fmt == 'ndjson' else _csv(columns, chunks)
+    filename = f"{dataset}_{date.today().isoformat()}.{fmt}"
+    return body, media_type, filename
@@ -0,0 +1,55 @@
+"""
+Serialización JSON rápida para respuestas grandes.
+Usa orjson si está instalado (nativo, entiende numpy y fechas); si no, recurre a
+json de la librería estándar tras normalizar los valores. En ambos casos NaN/inf
+se emiten como null, que es lo que espera el cliente.
+"""
+import json
+import math
+from datetime import date, datetime
+
+import numpy as np
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _json_value(value):
+    """Convierte tipos numpy/fechas y NaN/inf (-> None) a valores JSON estándar."""
+    if isinstance(value, dict):
+        return {k: _json_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_value(v) for v in value]
+    if isinstance(value, (float, np.floating)):
+        value = float(value)
+        return value if math.isfinite(value) else None
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def _orjson_default(value):
+    # Tipos que orjson no serializa de forma nativa (p. ej. pd.Timestamp, Decimal)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+def dumps(payload) -> bytes:
+    """Serializa un payload a bytes JSON UTF-8."""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_orjson_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(_json_value(payload), ensure_ascii=False).encode('utf-8')
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse que serializa con dumps(); devolverla directamente evita jsonable_encoder."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
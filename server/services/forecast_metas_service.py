@@ -0,0 +1,23 @@
+"""
+Metas del Forecast ingresadas por el usuario (forecast_metas.json).
+Estructura: {"DIC 25": {"<regional>": meta, ...}, ...}
+"""
+import os
+
+from services import data_versions
+from services.journal_store import JournalStore
+
+FORECAST_METAS_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "forecast_metas.json")
+
+_store = JournalStore(FORECAST_METAS_FILE, data_versions.FORECAST_METAS)
+
+def get_sheet_metas(sheet_name: str) -> dict:
+    return _store.get(sheet_name) or {}
+
+def get_metas_stamp() -> str:
+    """Huella del contenido de las metas, estable entre reinicios."""
+    return _store.content_stamp()
+
+def save_sheet_metas(sheet_name: str, metas: dict):
+    """Reemplaza las metas de una hoja (un registro en el journal)."""
+    _store.set(sheet_name, metas)
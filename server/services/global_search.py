@@ -0,0 +1,228 @@
+"""
+Búsqueda global entre módulos: REPORTE, Consecutivos, Cancelaciones y Renovaciones.
+Cada fuente es un segmento del índice que se reconstruye solo cuando esa fuente
+cambia; los resultados se agrupan por póliza y se enriquecen con búsquedas hash
+en los demás segmentos (sin cargar datasets completos por consulta). Las búsquedas
+por póliza usan los índices de policy_join (mismas posiciones que cada segmento).
+"""
+import threading
+import time
+
+from services.search_index import InvertedIndex, fold_text, normalize_policy_key, get_snapshot_index
+from services.unified_data_processor import load_unified_cache, get_snapshot_generation
+
+MONTH_NAMES = {1: 'ENE', 2: 'FEB', 3: 'MAR', 4: 'ABR', 5: 'MAY', 6: 'JUN',
+               7: 'JUL', 8: 'AGO', 9: 'SEP', 10: 'OCT', 11: 'NOV', 12: 'DIC'}
+
+SOURCES = ('reporte', 'consecutivos', 'cancelaciones', 'renewals')
+CONSECUTIVO_PREFIX = 'consecutivo:'
+
+class _Segment:
+    """
+    Índice de texto + registros compactos de una fuente. records[i] resume
+    join.records[i], así que el índice hash de policy_join da las posiciones por póliza.
+    """
+
+    def __init__(self, version, index, records, join, key_of):
+        self.version = version
+        self.index = index
+        self.records = records
+        self.join = join
+        self.key_of = key_of
+
+    def positions(self, key: str) -> list:
+        """Posiciones del grupo `key` (póliza, o 'consecutivo:<n>' para filas sin póliza)."""
+        policy_col = self.join.key_columns[0] if self.join.key_columns else None
+        if not key.startswith(CONSECUTIVO_PREFIX):
+            return self.join.positions(key, [policy_col])
+        if len(self.join.key_columns) < 2:
+            return []
+        candidates = self.join.positions(key[len(CONSECUTIVO_PREFIX):], [self.join.key_columns[1]])
+        return [p for p in candidates if self.key_of(self.records[p]) == key]
+
+_segments = {}
+_lock = threading.Lock()
+
+def find_column(columns, *needles):
+    """Primera columna cuyo nombre (sin tildes) contiene alguno de los textos buscados."""
+    for col in columns:
+        folded = fold_text(col)
+        if any(n in folded for n in needles):
+            return col
+    return None
+
+def _policy_or_consecutivo_key(poliza, consecutivo):
+    key = normalize_policy_key(poliza)
+    if key:
+        return key
+    cons = normalize_policy_key(consecutivo)
+    return f"{CONSECUTIVO_PREFIX}{cons}" if cons else ''
+
+# ==================== CONSTRUCCIÓN DE SEGMENTOS ====================
+
+def _join_index(source):
+    from services.policy_join import get_join_index
+    return get_join_index(source)
+
+def _build_reporte(version):
+    join = _join_index('reporte')
+    return _Segment(version, get_snapshot_index(), join.records, join,
+                    lambda r: _policy_or_consecutivo_key(r.get('POLIZA'), r.get('CONSECUTIVO')))
+
+def _build_consecutivos(version):
+    join = _join_index('consecutivos')
+    consecutivos = join.records
+    index = InvertedIndex(id_fields=('Consecutivo', 'Poliza'), text_fields=('Asegurado',))
+    for pos, record in enumerate(consecutivos):
+        index.add(record, pos, int(record.get('AÑO') or 0) * 100 + int(record.get('MES') or 0))
+    return _Segment(version, index, consecutivos, join,
+                    lambda r: _policy_or_consecutivo_key(r.get('Poliza'), r.get('Consecutivo')))
+
+def _build_cancelaciones(version):
+    # Registros base (sin inputs): el estado actual se aplica al resumir
+    join = _join_index('cancelaciones')
+    data = join.records
+
+    name_col = find_column(data[0].keys(), 'asegurado', 'tomador', 'nombre') if data else None
+    records = [{
+        'NUMERO_POLIZA': r.get('NUMERO_POLIZA'),
+        'ASEGURADO': r.get(name_col) if name_col else '',
+        'SUCURSAL': r.get('SUCURSAL'),
+        'REGIONAL': r.get('REGIONAL'),
+    } for r in data]
+
+    index = InvertedIndex(id_fields=('NUMERO_POLIZA',), text_fields=('ASEGURADO',))
+    for pos, record in enumerate(records):
+        index.add(record, pos)
+    return _Segment(version, index, records, join, lambda r: normalize_policy_key(r.get('NUMERO_POLIZA')))
+
+def _build_renewals(version):
+    join = _join_index('renewals')
+    data = join.records
+
+    columns = data[0].keys() if data else []
+    policy_col = find_column(columns, 'poliza')
+    name_col = find_column(columns, 'asegurado', 'tomador', 'nombre cliente')
+    records = []
+    for r in data:
+        mes = r.get('# MES')
+        try:
+            mes = int(mes) if mes else None
+        except (TypeError, ValueError):
+            mes = None
+        records.append({
+            'POLIZA': r.get(policy_col) if policy_col else None,
+            'ASEGURADO': r.get(name_col) if name_col else '',
+            'MES': MONTH_NAMES.get(mes),
+        })
+
+    index = InvertedIndex(id_fields=('POLIZA',), text_fields=('ASEGURADO',))
+    for pos, record in enumerate(records):
+        index.add(record, pos)
+    return _Segment(version, index, records, join, lambda r: normalize_policy_key(r.get('POLIZA')))
+
+def _source_versions():
+    from services.cancelaciones_service import get_cancelaciones_source_version
+    from services.renewals_service import get_renewals_source_version
+    generation = get_snapshot_generation()
+    return {
+        'reporte': generation,
+        'consecutivos': generation,
+        'cancelaciones': get_cancelaciones_source_version(),
+        'renewals': get_renewals_source_version()[0],
+    }
+
+_BUILDERS = {
+    'reporte': _build_reporte,
+    'consecutivos': _build_consecutivos,
+    'cancelaciones': _build_cancelaciones,
+    'renewals': _build_renewals,
+}
+
+def get_segments():
+    """Retorna los segmentos vigentes, reconstruyendo solo las fuentes que cambiaron."""
+    load_unified_cache()
+    versions = _source_versions()
+    stale = [s for s in SOURCES if s not in _segments or _segments[s].version != versions[s]]
+    if stale:
+        with _lock:
+            for source in stale:
+                if source in _segments and _segments[source].version == versions[source]:
+                    continue
+                start = time.perf_counter()
+                _segments[source] = _BUILDERS[source](versions[source])
+                elapsed = (time.perf_counter() - start) * 1000
+                print(f"[GLOBAL-SEARCH] Segmento '{source}' reconstruido ({len(_segments[source].records)} registros, {elapsed:.0f} ms)")
+    return dict(_segments)
+
+# ==================== CONSULTA ====================
+
+def _summarize(source, record, user_inputs):
+    if source == 'reporte':
+        return {k: record.get(k) for k in ('CONSECUTIVO', 'POLIZA', 'ASEGURADO', 'REGIONAL', 'ESTADO', 'AÑO', 'MES', 'PRIMA_TOTAL_USD')}
+    if source == 'consecutivos':
+        return {k: record.get(k) for k in ('Consecutivo', 'Poliza', 'Asegurado', 'Regional', 'Estado', 'AÑO', 'MES')}
+    if source == 'cancelaciones':
+        policy_id = str(record.get('NUMERO_POLIZA', ''))
+        estado = user_inputs.get(policy_id, {}).get('estado_actual') or 'Pendiente'
+        return {**record, 'ESTADO_ACTUAL': estado}
+    return dict(record)
+
+def _describe(policy, sources):
+    parts = []
+    if sources.get('reporte'):
+        parts.append("aparece en reporte")
+    if sources.get('consecutivos'):
+        parts.append("está en consecutivos pendientes")
+    if sources.get('cancelaciones'):
+        estados = sorted({c['ESTADO_ACTUAL'] for c in sources['cancelaciones']})
+        parts.append(f"está en cancelaciones con ESTADO_ACTUAL {', '.join(estados)}")
+    if sources.get('renewals'):
+        meses = [r['MES'] for r in sources['renewals'] if r.get('MES')]
+        parts.append(f"renueva en {', '.join(meses)}" if meses else "está en renovaciones")
+    label = policy.replace(CONSECUTIVO_PREFIX, 'Consecutivo ') if policy.startswith(CONSECUTIVO_PREFIX) else f"Póliza {policy}"
+    return f"{label} " + "; ".join(parts)
+
+def global_search(query: str, limit: int = 20) -> dict:
+    """Busca en las cuatro fuentes y agrupa los resultados por póliza."""
+    from services.cancelaciones_service import load_user_inputs
+
+    start = time.perf_counter()
+    segments = get_segments()
+
+    # 1. Buscar en cada segmento y agrupar por clave de póliza (mejor score)
+    groups = {}
+    for source in SOURCES:
+        segment = segments[source]
+        _, results = segment.index.search(query, limit * 3)
+        for score, pos in results:
+            key = segment.key_of(segment.records[pos])
+            if key and score > groups.get(key, 0):
+                groups[key] = score
+
+    top = sorted(groups.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+
+    # 2. Enriquecer cada póliza con lookups hash en todas las fuentes
+    user_inputs = load_user_inputs()
+    hits = []
+    for key, score in top:
+        sources = {}
+        for source in SOURCES:
+            segment = segments[source]
+            positions = segment.positions(key)
+            if positions:
+                sources[source] = [_summarize(source, segment.records[p], user_inputs) for p in positions[:10]]
+        hits.append({
+            'policy': key,
+            'score': round(score, 3),
+            'types': list(sources.keys()),
+            'summary': _describe(key, sources),
+            'sources': sources,
+        })
+
+    return {
+        'data': hits,
+        'total': len(groups),
+        'versions': {s: segments[s].version for s in SOURCES},
+        'took_ms': round((time.perf_counter() - start) * 1000, 2)
+    }
@@ -0,0 +1,67 @@
+"""
+Respuestas condicionales (ETag / If-None-Match) para endpoints de datos.
+El ETag se deriva de la ruta, los parámetros y las versiones de las fuentes de
+datos de las que depende la respuesta, así que se calcula sin construir el payload:
+si el cliente ya tiene esa versión se responde 304 sin cuerpo.
+"""
+import hashlib
+import os
+import time
+
+from fastapi import Depends, HTTPException, Request, Response
+
+from services import data_versions
+from services.unified_data_processor import load_unified_cache
+
+# Las versiones se reinician con el proceso: el arranque forma parte del ETag
+_BOOT_ID = f"{os.getpid()}-{time.time_ns()}"
+
+# Datos: el navegador puede guardarlos pero debe revalidar siempre con el ETag
+DATA_CACHE_CONTROL = "private, no-cache"
+# Listas de metadatos (años, meses, hojas): cambian solo al recargar el Excel
+METADATA_CACHE_CONTROL = "private, max-age=60, must-revalidate"
+
+def compute_etag(route: str, params, versions) -> str:
+    raw = repr((_BOOT_ID, route, tuple(sorted(params)), tuple(versions)))
+    return f'W/"{hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]}"'
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Compara If-None-Match (lista separada por comas, '*' o etiquetas débiles) con el ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+def conditional(route: str, sources=(), stamps=(), cache_control: str = DATA_CACHE_CONTROL, vary=()):
+    """
+    Dependencia FastAPI que agrega ETag y Cache-Control a la respuesta y corta con 304
+    si If-None-Match coincide. sources son nombres de data_versions; stamps son callables
+    que retornan una marca de versión adicional (p. ej. mtime de un archivo); vary son
+    valores extra que cambian la respuesta (p. ej. la fecha de hoy).
+    Retorna los headers para endpoints que construyen su propio Response.
+    """
+    sources = tuple(sources)
+
+    def dependency(request: Request, response: Response) -> dict:
+        if data_versions.SNAPSHOT in sources:
+            # Asegura que la generación del snapshot exista antes de calcular el ETag
+            load_unified_cache()
+        versions = data_versions.get_versions(*sources) + tuple(stamp() for stamp in stamps)
+        versions += tuple(v() if callable(v) else v for v in vary)
+        params = list(request.path_params.items()) + list(request.query_params.multi_items())
+        etag = compute_etag(route, params, versions)
+        headers = {"ETag": etag, "Cache-Control": cache_control}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+        return headers
+
+    return Depends(dependency)
@@ -0,0 +1,276 @@
+"""
+Almacén clave-valor con journal para los archivos JSON editados por el usuario.
+Cada edición agrega un registro ({"op": "set"|"del", "key", "value"}) al final de
+<archivo>.journal, así el costo de guardar no depende del tamaño del almacén.
+
+Un único escritor por almacén agrupa las ediciones pendientes de los últimos
+milisegundos en una sola escritura + fsync (group commit); quien guarda espera a
+que su registro sea durable, así que los endpoints que guardan deben ser `def`
+(threadpool) y no `async def`.
+
+Una edición es visible en memoria (y la versión se incrementa) antes de ser
+durable. Si la espera supera WRITE_TIMEOUT se lanza IOError, pero la edición no se
+revierte: sigue en cola y el escritor la reintenta (ediciones posteriores pueden
+haberse basado en ella). Un compactador en segundo plano reescribe
+periódicamente el snapshot (<archivo>, el mismo JSON de siempre; temporal + fsync
++ rename) y recorta el journal. Al arrancar, el estado en memoria se reconstruye
+con snapshot + journal.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from services import data_versions
+
+COMPACT_INTERVAL = 60    # segundos entre pasadas del compactador
+COALESCE_DELAY = 0.002   # segundos que el escritor espera para juntar ediciones
+WRITE_TIMEOUT = 10       # segundos máximos esperando que una edición sea durable
+
+_stores = []
+_compactor = {'thread': None}
+_registry_lock = threading.Lock()
+
+class JournalStore:
+    """dict persistente: lecturas desde memoria, escrituras = un registro en el journal."""
+
+    def __init__(self, path, version_name=None):
+        self.path = str(path)
+        self.journal_path = self.path + '.journal'
+        self.version_name = version_name
+        self._lock = threading.Lock()        # estado en memoria + cola de pendientes
+        self._io_lock = threading.Lock()     # archivo del journal (escritor / compactador)
+        self._durable = threading.Condition()
+        self._data = self._load_snapshot()
+        self._journal_records = self._replay_journal()
+        self._journal = None
+        self._pending = []
+        self._seq = 0            # último registro encolado
+        self._durable_seq = 0    # último registro escrito + fsync
+        self._writer = None
+        self.stats = {'records': 0, 'batches': 0}
+        self._stamp = None       # (seq, huella del contenido)
+        _register(self)
+
+    # ==================== CARGA ====================
+
+    def _load_snapshot(self) -> dict:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f) or {}
+        except Exception as e:
+            print(f"[JOURNAL] Error leyendo snapshot {os.path.basename(self.path)}: {e}")
+            return {}
+
+    def _apply(self, record):
+        if record.get('op') == 'del':
+            self._data.pop(record['key'], None)
+        else:
+            self._data[record['key']] = record.get('value')
+
+    def _replay_journal(self) -> int:
+        """
+        Aplica los registros completos del journal. Una última línea sin salto de línea
+        (caída a mitad de escritura) se descarta y se recorta del archivo, para que el
+        próximo registro no se escriba pegado a ella.
+        """
+        if not os.path.exists(self.journal_path):
+            return 0
+        count = 0
+        valid_end = 0   # offset del último '\n' completo
+        with open(self.journal_path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                valid_end += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    print(f"[JOURNAL] Registro inválido ignorado en {os.path.basename(self.journal_path)}")
+                    continue
+                self._apply(record)
+                count += 1
+        if valid_end < os.path.getsize(self.journal_path):
+            print(f"[JOURNAL] Registro incompleto descartado en {os.path.basename(self.journal_path)}")
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(valid_end)
+                f.flush()
+                os.fsync(f.fileno())
+        return count
+
+    # ==================== LECTURA ====================
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def all(self) -> dict:
+        """Estado completo en memoria (no modificar)."""
+        return self._data
+
+    def content_stamp(self) -> str:
+        """Huella del contenido, estable entre reinicios (para cachés en disco)."""
+        with self._lock:
+            if self._stamp is None or self._stamp[0] != self._seq:
+                raw = json.dumps(self._data, sort_keys=True, ensure_ascii=False)
+                self._stamp = (self._seq, hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16])
+            return self._stamp[1]
+
+    # ==================== ESCRITURA ====================
+
+    def _enqueue(self, record) -> int:
+        """Encola un registro (llamar con self._lock tomado); retorna su número de secuencia."""
+        self._pending.append(json.dumps(record, ensure_ascii=False) + '\n')
+        self._seq += 1
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(target=self._run_writer, daemon=True,
+                                            name=f"journal-{os.path.basename(self.path)}")
+            self._writer.start()
+        with self._durable:
+            self._durable.notify_all()
+        return self._seq
+
+    def _wait_durable(self, seq):
+        deadline = time.monotonic() + WRITE_TIMEOUT
+        with self._durable:
+            while self._durable_seq < seq:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise IOError(f"No se pudo persistir {os.path.basename(self.journal_path)}")
+                self._durable.wait(remaining)
+
+    def _run_writer(self):
+        while True:
+            with self._durable:
+                while self._durable_seq >= self._seq:
+                    self._durable.wait()
+            # Juntar las ediciones que lleguen en los próximos milisegundos
+            time.sleep(COALESCE_DELAY)
+            with self._io_lock:
+                with self._lock:
+                    batch, self._pending = self._pending, []
+                    last_seq = self._seq
+                try:
+                    self._write_batch(batch)
+                except Exception as e:
+                    print(f"[JOURNAL] Error escribiendo {os.path.basename(self.journal_path)}: {e}")
+                    with self._lock:
+                        self._pending = batch + self._pending
+                    time.sleep(0.5)
+                    continue
+            with self._durable:
+                self._durable_seq = last_seq
+                self._durable.notify_all()
+
+    def _write_batch(self, batch):
+        if not batch:
+            return
+        if self._journal is None:
+            os.makedirs(os.path.dirname(self.journal_path), exist_ok=True)
+            self._journal = open(self.journal_path, 'a', encoding='utf-8')
+        self._journal.write(''.join(batch))
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._journal_records += len(batch)
+        self.stats['records'] += len(batch)
+        self.stats['batches'] += 1
+
+    def _bump(self):
+        if self.version_name:
+            data_versions.bump_version(self.version_name)
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            seq = self._enqueue({'op': 'set', 'key': key, 'value': value})
+        self._bump()
+        self._wait_durable(seq)
+        return value
+
+    def update(self, key, fn, default=None):
+        """Lectura-modificación-escritura atómica de una clave: value = fn(valor actual)."""
+        with self._lock:
+            value = fn(self._data.get(key, default))
+            self._data[key] = value
+            seq = self._enqueue({'op': 'set', 'key': key, 'value': value})
+        self._bump()
+        self._wait_durable(seq)
+        return value
+
+    def delete(self, key) -> bool:
+        with self._lock:
+            if key not in self._data:
+                return False
+            del self._data[key]
+            seq = self._enqueue({'op': 'del', 'key': key})
+        self._bump()
+        self._wait_durable(seq)
+        return True
+
+    # ==================== COMPACTACIÓN ====================
+
+    def pending_records(self) -> int:
+        return self._journal_records
+
+    def compact(self) -> bool:
+        """
+        Escribe el snapshot (temporal + fsync + rename) y recorta el journal. El snapshot
+        se escribe sin bloquear al escritor; solo se conservan los registros que este
+        agregó mientras tanto.
+        """
+        with self._io_lock:
+            with self._lock:
+                if not self._journal_records:
+                    return False
+                snapshot = dict(self._data)
+            offset = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+
+        with self._io_lock:
+            os.replace(tmp_path, self.path)
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            tail = b''
+            if os.path.exists(self.journal_path):
+                with open(self.journal_path, 'rb') as f:
+                    f.seek(offset)
+                    tail = f.read()
+            journal_tmp = self.journal_path + '.tmp'
+            with open(journal_tmp, 'wb') as f:
+                f.write(tail)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(journal_tmp, self.journal_path)
+            self._journal_records = tail.count(b'\n')
+        return True
+
+def _register(store):
+    with _registry_lock:
+        _stores.append(store)
+        thread = _compactor['thread']
+        if thread is None or not thread.is_alive():
+            thread = threading.Thread(target=_run_compactor, name='journal-compactor', daemon=True)
+            thread.start()
+            _compactor['thread'] = thread
+
+def _run_compactor():
+    while True:
+        time.sleep(COMPACT_INTERVAL)
+        compact_all()
+
+def compact_all():
+    """Compacta todos los almacenes con registros pendientes."""
+    for store in list(_stores):
+        try:
+            if store.compact():
+                print(f"[JOURNAL] Compactado {os.path.basename(store.path)}")
+        except Exception as e:
+            print(f"[JOURNAL] Error compactando {os.path.basename(store.path)}: {e}")
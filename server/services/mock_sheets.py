@@ -1,7 +1,8 @@
 import pandas as pd
-import numpy as np
 import os
 import re
+import threading
+from services.canonical import canonical_records, ISO_DATE
 
 # Map frontend names to actual filenames
 FILE_MAPPING = {
@@ -25,6 +26,51 @@ def clean_currency(value):
     except ValueError:
         return 0
 
+# Hojas ya leídas y normalizadas: (archivo, hoja, layout) -> (mtime, registros)
+_sheet_cache = {}
+_sheet_lock = threading.Lock()
+
+def _read_sheet_records(file_path, sheet, forecast_layout=False):
+    if forecast_layout:
+        df = pd.read_excel(file_path, sheet_name=sheet, header=3)
+        if len(df.columns) >= 9:
+            new_df = pd.DataFrame()
+            new_df["Nombre"] = df.iloc[:, 1]
+            new_df["Meta"] = df.iloc[:, 2]
+            new_df["Real"] = df.iloc[:, 3]
+            new_df["Cumplimiento"] = df.iloc[:, 4]
+            new_df["Primas Expedidas"] = df.iloc[:, 5]
+            new_df["Primas Pagadas"] = df.iloc[:, 6]
+            new_df["Primas Pendientes"] = df.iloc[:, 7]
+            new_df["Primas Anuladas"] = df.iloc[:, 8]
+            df = new_df
+    else:
+        df = pd.read_excel(file_path, sheet_name=sheet)
+
+    # Clean currency columns
+    price_cols = [c for c in df.columns if any(x in str(c).upper() for x in ["PRIMA", "VALOR", "PROYECC"])]
+    for col in price_cols:
+        df[col] = df[col].apply(clean_currency)
+
+    # JSON safety una sola vez: vacíos -> "", fechas YYYY-MM-DD, floats finitos
+    return canonical_records(df, null="", date_format=ISO_DATE)
+
+def _load_sheet_records(file_path, sheet, forecast_layout=False):
+    """
+    Registros de una hoja, releyendo el Excel solo si el archivo cambió.
+    Retorna una copia de la lista (se puede filtrar/ordenar); los dicts son los de la
+    caché y no deben modificarse.
+    """
+    mtime = os.path.getmtime(file_path)
+    key = (file_path, sheet, forecast_layout)
+    cached = _sheet_cache.get(key)
+    if cached is None or cached[0] != mtime:
+        with _sheet_lock:
+            cached = _sheet_cache.get(key)
+            if cached is None or cached[0] != mtime:
+                cached = _sheet_cache[key] = (mtime, _read_sheet_records(file_path, sheet, forecast_layout))
+    return list(cached[1])
+
 def generate_mock_data(sheet_name):
     """Reads actual local Excel files with optimized DETALLE handling."""
     
@@ -224,41 +270,10 @@ def generate_mock_data(sheet_name):
                 recent = all_sheets[-12:] if len(all_sheets) > 12 else all_sheets
                 return {"type": "multi_sheet_metadata", "sheets": recent, "default": recent[-1]}
             
-            # Read specific sheet
-            if "FORECAST CIERRE MES" in search_name.upper():
-                df = pd.read_excel(file_path, sheet_name=sub_sheet_request, header=3)
-                if len(df.columns) >= 9:
-                    new_df = pd.DataFrame()
-                    new_df["Nombre"] = df.iloc[:, 1]
-                    new_df["Meta"] = df.iloc[:, 2]
-                    new_df["Real"] = df.iloc[:, 3]
-                    new_df["Cumplimiento"] = df.iloc[:, 4]
-                    new_df["Primas Expedidas"] = df.iloc[:, 5]
-                    new_df["Primas Pagadas"] = df.iloc[:, 6]
-                    new_df["Primas Pendientes"] = df.iloc[:, 7]
-                    new_df["Primas Anuladas"] = df.iloc[:, 8]
-                    df = new_df
-            else:
-                df = pd.read_excel(file_path, sheet_name=sub_sheet_request)
-        else:
-            # Generic file read
-            df = pd.read_excel(file_path, sheet_name=0)
-        
-        # Clean currency columns
-        price_cols = [c for c in df.columns if any(x in str(c).upper() for x in ["PRIMA", "VALOR", "PROYECC"])]
-        for col in price_cols:
-            df[col] = df[col].apply(clean_currency)
-
-        # JSON safety
-        df = df.replace([np.nan, np.inf, -np.inf], None)
-        
-        # Date formatting
-        for col in df.columns:
-            if pd.api.types.is_datetime64_any_dtype(df[col]):
-                df[col] = df[col].dt.strftime('%Y-%m-%d')
+            return _load_sheet_records(file_path, sub_sheet_request, "FORECAST CIERRE MES" in search_name.upper())
         
-        df = df.fillna("").infer_objects(copy=False)
-        return df.to_dict(orient='records')
+        # Generic file read
+        return _load_sheet_records(file_path, 0)
         
     except Exception as e:
         print(f"Error reading sheet: {e}")
@@ -0,0 +1,53 @@
+"""
+Consultas de historia de estados de pólizas ("time travel"), resueltas con los
+índices de policy_state_history en SQLite en lugar de recorrer backups completos.
+"""
+from datetime import date, datetime, time
+
+import numpy as np
+
+from services.policy_state_manager import policy_state_manager
+from services.state_overlay import resolve_final_state, FINAL_STATES
+from services.unified_data_processor import get_todos_dataframe, get_all_records
+
+MONTH_COLUMNS = ['CONSECUTIVO', 'POLIZA', 'ASEGURADO', 'REGIONAL', 'ESTADO', 'PRIMA_TOTAL_USD']
+
+def _bound(value: str, day_time):
+    if not value:
+        return None
+    if len(value) == 10:
+        return datetime.combine(date.fromisoformat(value), day_time).isoformat()
+    return datetime.fromisoformat(value).isoformat()
+
+def day_bounds(desde: str = None, hasta: str = None):
+    """
+    Fechas 'YYYY-MM-DD' (o ISO completas) -> límites ISO inclusivos; hasta cubre el día completo.
+    Lanza ValueError si alguna fecha es inválida.
+    """
+    return _bound(desde, time.min), _bound(hasta, time.max)
+
+def get_month_states_as_of(year: int, month: int, as_of: date) -> dict:
+    """
+    Estado final de las pólizas de un mes (AÑO/MES del REPORTE) tal como estaba al
+    cierre del día as_of. El estado guardado vigente en esa fecha tiene prioridad;
+    sin estado guardado se usa el ESTADO del Excel actual.
+    """
+    saved = policy_state_manager.get_states_as_of(datetime.combine(as_of, time.max).isoformat())
+    df = get_todos_dataframe()
+    todos = get_all_records()
+    positions = np.flatnonzero(((df['AÑO'] == int(year)) & (df['MES'] == int(month))).to_numpy()) if len(df) else []
+
+    summary = {name: {'count': 0, 'total_usd': 0.0} for name in FINAL_STATES}
+    data = []
+    for pos in positions:
+        record = todos[pos]
+        state = saved.get(str(record.get('CONSECUTIVO', '')))
+        final = FINAL_STATES[resolve_final_state(record, state)]
+        prima = record.get('PRIMA_TOTAL_USD') or 0
+        summary[final]['count'] += 1
+        summary[final]['total_usd'] += prima if isinstance(prima, (int, float)) else 0
+        row = {col: record.get(col) for col in MONTH_COLUMNS}
+        row['estado_guardado'] = state['estado'] if state else None
+        row['estado_final'] = final
+        data.append(row)
+    return {'as_of': as_of.isoformat(), 'year': int(year), 'month': int(month), 'summary': summary, 'data': data}
@@ -0,0 +1,174 @@
+"""
+Capa de joins por número de póliza entre REPORTE, Cancelaciones y Renovaciones.
+Cada dataset construye, al cargarse, índices hash por número de póliza
+normalizado; las vistas 360° y los joins masivos usan solo búsquedas O(1).
+Es la única capa de índices por póliza: la búsqueda global la reutiliza.
+"""
+import threading
+
+from services.search_index import normalize_policy_key
+from services.global_search import find_column
+
+class HashJoinIndex:
+    """Registros de un dataset + índice hash (clave normalizada -> posiciones) por columna."""
+
+    def __init__(self, version, records, key_columns):
+        self.version = version
+        self.records = records
+        self.key_columns = [col for col in key_columns if col]   # [póliza, consecutivo?]
+        self.keys = {}
+        for col in self.key_columns:
+            index = {}
+            for pos, record in enumerate(records):
+                key = normalize_policy_key(record.get(col))
+                if key:
+                    index.setdefault(key, []).append(pos)
+            self.keys[col] = index
+
+    def positions(self, key: str, columns=None) -> list:
+        """Posiciones de los registros cuya clave normalizada coincide (sin duplicados)."""
+        positions = []
+        for col in columns or self.keys.keys():
+            for pos in self.keys.get(col, {}).get(key, []):
+                if pos not in positions:
+                    positions.append(pos)
+        return positions
+
+    def lookup(self, key: str, columns=None) -> list:
+        """Retorna los registros cuya clave normalizada coincide (sin duplicados)."""
+        return [self.records[p] for p in self.positions(key, columns)]
+
+_indexes = {}
+_lock = threading.Lock()
+
+# ==================== DATASETS ====================
+
+def _reporte_dataset():
+    from services.unified_data_processor import load_unified_cache, get_snapshot_generation
+    todos = load_unified_cache().get('todos') or []
+    return get_snapshot_generation(), lambda: (todos, ['POLIZA', 'CONSECUTIVO'])
+
+def _consecutivos_dataset():
+    from services.unified_data_processor import load_unified_cache, get_snapshot_generation
+    consecutivos = load_unified_cache().get('consecutivos') or []
+    return get_snapshot_generation(), lambda: (consecutivos, ['Poliza', 'Consecutivo'])
+
+def _cancelaciones_dataset():
+    from services.cancelaciones_service import get_cancelaciones_source_version
+
+    def load():
+        from services.cancelaciones_service import get_cancelaciones_base
+        try:
+            # Registros base: los inputs del usuario se aplican al consultar
+            return get_cancelaciones_base()['records'], ['NUMERO_POLIZA']
+        except FileNotFoundError as e:
+            print(f"[JOIN] Cancelaciones no disponibles: {e}")
+            return [], []
+    return get_cancelaciones_source_version(), load
+
+def _renewals_dataset():
+    from services.renewals_service import get_renewals_source_version
+
+    def load():
+        from services.renewals_service import load_renewals_data
+        data = load_renewals_data() or []
+        policy_col = find_column(data[0].keys(), 'poliza') if data else None
+        return data, [policy_col]
+    return get_renewals_source_version()[0], load
+
+_DATASETS = {
+    'reporte': _reporte_dataset,
+    'consecutivos': _consecutivos_dataset,
+    'cancelaciones': _cancelaciones_dataset,
+    'renewals': _renewals_dataset,
+}
+
+def get_join_index(name: str) -> HashJoinIndex:
+    """Retorna el índice hash de un dataset, reconstruyéndolo solo si su versión cambió."""
+    version, load = _DATASETS[name]()
+    current = _indexes.get(name)
+    if current and current.version == version:
+        return current
+
+    with _lock:
+        current = _indexes.get(name)
+        if current and current.version == version:
+            return current
+        records, key_columns = load()
+        current = HashJoinIndex(version, records, key_columns)
+        _indexes[name] = current
+        print(f"[JOIN] Índice '{name}' construido: {len(records)} registros")
+        return current
+
+# ==================== OVERLAYS ====================
+
+def _with_cancelacion_inputs(record, user_inputs):
+    """Aplica los inputs del usuario vigentes (pueden ser más nuevos que el índice)."""
+    from services.cancelaciones_service import apply_user_inputs
+    return apply_user_inputs(record, user_inputs.get(str(record.get('NUMERO_POLIZA', ''))))
+
+# ==================== VISTAS ====================
+
+def get_policy_360(policy_id: str) -> dict:
+    """Vista 360° de una póliza (o consecutivo) en todas las fuentes."""
+    from services.cancelaciones_service import load_user_inputs
+    from services.policy_state_manager import policy_state_manager
+
+    key = normalize_policy_key(policy_id)
+    if not key:
+        return {'policy': policy_id, 'found': False}
+
+    reporte = get_join_index('reporte').lookup(key)
+    user_inputs = load_user_inputs()
+    cancelaciones = [_with_cancelacion_inputs(r, user_inputs)
+                     for r in get_join_index('cancelaciones').lookup(key)]
+    renewals = get_join_index('renewals').lookup(key)
+
+    states = {}
+    for record in reporte:
+        consecutivo = str(record.get('CONSECUTIVO', ''))
+        state = policy_state_manager.get_state(consecutivo) if consecutivo else None
+        if state:
+            states[consecutivo] = state
+
+    return {
+        'policy': key,
+        'found': bool(reporte or cancelaciones or renewals),
+        'reporte': reporte,
+        'policy_states': states,
+        'cancelaciones': cancelaciones,
+        'renewals': renewals,
+    }
+
+def join_cancelaciones_with_reporte(estado_actual: str = None, only_matched: bool = False) -> list:
+    """
+    Join masivo: cada cancelación con su prima original y regional del REPORTE.
+    Recorre cancelaciones una vez y busca cada póliza en el índice hash del REPORTE.
+    """
+    from services.cancelaciones_service import load_user_inputs
+
+    reporte_index = get_join_index('reporte')
+    user_inputs = load_user_inputs()
+    estado_filter = estado_actual.strip().upper() if estado_actual else None
+
+    result = []
+    for record in get_join_index('cancelaciones').records:
+        record = _with_cancelacion_inputs(record, user_inputs)
+        if estado_filter and str(record.get('ESTADO_ACTUAL', '')).strip().upper() != estado_filter:
+            continue
+
+        matches = reporte_index.lookup(normalize_policy_key(record.get('NUMERO_POLIZA')), ['POLIZA'])
+        if only_matched and not matches:
+            continue
+
+        original = matches[0] if matches else {}
+        result.append({
+            **record,
+            'REPORTE_CONSECUTIVO': original.get('CONSECUTIVO'),
+            'REPORTE_REGIONAL': original.get('REGIONAL'),
+            'REPORTE_PRIMA_TOTAL_USD': original.get('PRIMA_TOTAL_USD'),
+            'REPORTE_PRIMA_SIN_IVA_USD': original.get('PRIMA_SIN_IVA_USD'),
+            'REPORTE_FECHA_EXPEDICION': original.get('FECHA_EXPEDICION'),
+            'REPORTE_MATCHES': len(matches),
+        })
+    return result
@@ -0,0 +1,138 @@
+"""
+Importación masiva de estados de pólizas desde un Excel (columnas CONSECUTIVO / ESTADO).
+Las hojas se eligen leyendo solo la fila de encabezados y la dimensión del libro
+(openpyxl read-only); la hoja elegida se recorre en streaming tomando únicamente
+las dos columnas necesarias, el ESTADO se normaliza de forma vectorizada con una
+tabla de mapeo y los cambios se guardan en una sola transacción.
+"""
+from zipfile import BadZipFile
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+
+from services.policy_state_manager import policy_state_manager
+
+IMPORT_USER = 'Sistema (Script Masivo)'
+PRIORITY_KEYWORDS = ['REPORTE', 'DETALLE', 'DATOS', 'BASE']
+PRIORITY_MIN_ROWS = 1000
+
+# Valor del Excel -> estado del sistema
+STATE_MAPPING = {
+    'SOLICITUD EN ESTUDIO': 'PENDIENTE',
+    'PENDIENTE': 'PENDIENTE',
+    'EXPEDIDA': 'PENDIENTE',
+    'RECAUDADA': 'RECAUDADA',
+    'PAGADA': 'RECAUDADA',
+    'ANULADA': 'ANULADA',
+    'CANCELADA': 'ANULADA',
+    'DEVUELTA': 'ANULADA',
+    'NO TOMADO': 'ANULADA'
+}
+
+# Búsqueda parcial (en orden) para valores fuera de la tabla
+PARTIAL_RULES = [
+    (r'ANULAD|CANCEL', 'ANULADA'),
+    (r'RECAUD|PAGAD', 'RECAUDADA'),
+    (r'PENDIENTE|ESTUDIO|TRAMITE', 'PENDIENTE'),
+]
+DEFAULT_STATE = 'PENDIENTE'
+
+def normalize_statuses(raw) -> pd.Series:
+    """Serie de ESTADO del Excel -> estados del sistema (vacíos y desconocidos -> PENDIENTE)."""
+    raw = pd.Series(raw, dtype=object)
+    text = raw.where(raw.notna(), '').astype(str).str.upper().str.strip()
+    result = text.map(STATE_MAPPING)
+    missing = result.isna()
+    if missing.any():
+        rest = text[missing]
+        conditions = [rest.str.contains(pattern, regex=True) for pattern, _ in PARTIAL_RULES]
+        result[missing] = np.select(conditions, [state for _, state in PARTIAL_RULES], default=DEFAULT_STATE)
+    return result
+
+def _header_index(header) -> dict:
+    return {str(h).upper().strip(): i for i, h in enumerate(header or ()) if h is not None}
+
+def probe_sheets(path) -> list:
+    """[{name, rows, columns, priority}] de las hojas con CONSECUTIVO, sin leer sus datos."""
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheets = []
+        for ws in wb.worksheets:
+            header = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), None)
+            columns = _header_index(header)
+            if 'CONSECUTIVO' not in columns:
+                continue
+            sheets.append({
+                'name': ws.title,
+                'rows': max((ws.max_row or 1) - 1, 0),
+                'columns': columns,
+                'priority': any(k in ws.title.upper() for k in PRIORITY_KEYWORDS),
+            })
+        return sheets
+    finally:
+        wb.close()
+
+def choose_sheet(sheets):
+    """Primera hoja prioritaria con más de PRIORITY_MIN_ROWS filas; si no hay, la de más filas."""
+    ordered = [s for s in sheets if s['priority']] + [s for s in sheets if not s['priority']]
+    for sheet in ordered:
+        if sheet['priority'] and sheet['rows'] > PRIORITY_MIN_ROWS:
+            return sheet
+    return max(ordered, key=lambda s: s['rows'], default=None)
+
+def _consecutivo_key(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    key = str(value).strip() if value is not None else ''
+    return '' if key.lower() in ('nan', 'none') else key
+
+def read_sheet_states(path, sheet) -> dict:
+    """{consecutivo: estado normalizado} leyendo solo CONSECUTIVO y ESTADO (la última fila gana)."""
+    cons_idx = sheet['columns']['CONSECUTIVO']
+    estado_idx = sheet['columns'].get('ESTADO')
+    consecutivos, estados = [], []
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for row in wb[sheet['name']].iter_rows(min_row=2, values_only=True):
+            if cons_idx >= len(row):
+                continue
+            consecutivos.append(row[cons_idx])
+            estados.append(row[estado_idx] if estado_idx is not None and estado_idx < len(row) else None)
+    finally:
+        wb.close()
+
+    keys = [_consecutivo_key(c) for c in consecutivos]
+    normalized = normalize_statuses(estados).tolist()
+    return {k: e for k, e in zip(keys, normalized) if k}
+
+def import_policy_states(path, usuario: str = IMPORT_USER, dry_run: bool = False) -> dict:
+    """Importa los estados del Excel al almacén de estados; retorna el resumen."""
+    try:
+        sheets = probe_sheets(path)
+    except (InvalidFileException, BadZipFile) as e:
+        raise ValueError(f"Archivo Excel inválido: {e}")
+    sheet = choose_sheet(sheets)
+    if sheet is None:
+        raise ValueError("No se encontró ninguna hoja con columna CONSECUTIVO")
+
+    imported = read_sheet_states(path, sheet)
+    current = policy_state_manager.get_all_states()
+    new = [c for c in imported if c not in current]
+    updated = [c for c in imported if c in current and current[c].get('estado') != imported[c]]
+
+    if not dry_run and (new or updated):
+        # Una sola transacción y una sola actualización de los agregados derivados
+        policy_state_manager.save_states([(c, imported[c]) for c in new + updated], usuario)
+        print(f"[IMPORT] {len(updated)} actualizados, {len(new)} nuevos desde '{sheet['name']}'")
+
+    return {
+        'sheet': sheet['name'],
+        'rows': len(imported),
+        'updated': len(updated),
+        'new': len(new),
+        'unchanged': len(imported) - len(updated) - len(new),
+        'total_states': len(policy_state_manager.get_all_states()),
+        'dry_run': dry_run,
+    }
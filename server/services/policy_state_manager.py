@@ -1,65 +1,323 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
+from contextlib import contextmanager
 from datetime import datetime
 import json
-import os
+import sqlite3
+import threading
 from pathlib import Path
+from services import data_versions
 
 class PolicyStateRequest(BaseModel):
     consecutivo: str
     estado: str  # "RECAUDADA", "ANULADA", etc.
     usuario: Optional[str] = "Sistema"
 
+class PolicyStateItem(BaseModel):
+    consecutivo: str
+    estado: str
+
+class PolicyStatesBulkRequest(BaseModel):
+    items: List[PolicyStateItem]
+    usuario: Optional[str] = "Sistema"
+
+MAX_BULK_ITEMS = 2000
+
+DEFAULT_STATES_FILE = Path(__file__).resolve().parent.parent / "data" / "policy_states.json"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS policy_states (
+    consecutivo TEXT PRIMARY KEY,
+    estado TEXT NOT NULL,
+    fecha TEXT,
+    usuario TEXT
+);
+CREATE TABLE IF NOT EXISTS policy_state_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    consecutivo TEXT NOT NULL,
+    old_estado TEXT,
+    new_estado TEXT,
+    usuario TEXT,
+    fecha TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_consecutivo ON policy_state_history (consecutivo, fecha);
+CREATE INDEX IF NOT EXISTS idx_history_usuario ON policy_state_history (usuario, fecha);
+CREATE INDEX IF NOT EXISTS idx_history_fecha ON policy_state_history (fecha);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
 class PolicyStateManager:
-    def __init__(self, file_path: str = "server/data/policy_states.json"):
+    """
+    Policy states stored in a local SQLite database (WAL mode) with a write-through
+    in-memory dict: reads never touch disk, each save is a single-row upsert.
+    Every change also appends a row to policy_state_history (old -> new, usuario,
+    fecha), indexed by consecutivo, usuario and fecha for time-travel queries.
+    file_path is the legacy JSON store, imported once into <file_path>.db.
+    Commits from other processes are picked up by refresh(), which runs before
+    any POLICY_STATES version is read.
+    """
+
+    def __init__(self, file_path: str = DEFAULT_STATES_FILE, db_path: str = None):
         self.file_path = Path(file_path)
-        self.file_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        # Initialize file if it doesn't exist
-        if not self.file_path.exists():
-            self._write_states({})
-    
-    def _read_states(self) -> dict:
-        """Read states from JSON file"""
+        self.db_path = Path(db_path) if db_path else self.file_path.with_suffix('.db')
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._listeners = []
+
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate_json()
+        self._seed_history()
+        self._states = self._load_states()
+        self._db_version = self._data_version()
+
+    # ==================== STORAGE ====================
+
+    def _data_version(self) -> int:
+        """Changes when another connection (e.g. an import script) commits"""
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _load_states(self) -> dict:
+        rows = self._conn.execute("SELECT consecutivo, estado, fecha, usuario FROM policy_states").fetchall()
+        return {c: {"estado": e, "fecha": f, "usuario": u} for c, e, f, u in rows}
+
+    def _migrate_json(self):
+        """One-time import of the legacy policy_states.json"""
+        done = self._conn.execute("SELECT value FROM meta WHERE key = 'json_migrated'").fetchone()
+        if done or not self.file_path.exists():
+            return
         try:
             with open(self.file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+                states = json.load(f)
         except (FileNotFoundError, json.JSONDecodeError):
-            return {}
-    
-    def _write_states(self, states: dict):
-        """Write states to JSON file"""
-        with open(self.file_path, 'w', encoding='utf-8') as f:
-            json.dump(states, f, ensure_ascii=False, indent=2)
-    
+            states = {}
+        with self._lock, self._transaction():
+            self._upsert_many(states)
+            self._set_meta('json_migrated', datetime.now().isoformat())
+        print(f"[POLICY-STATES] Migrated {len(states)} states from {self.file_path.name} to {self.db_path.name}")
+
+    def _seed_history(self):
+        """States that predate the history table become its first entries (old_estado NULL)"""
+        if self._conn.execute("SELECT value FROM meta WHERE key = 'history_seeded'").fetchone():
+            return
+        with self._lock, self._transaction():
+            self._conn.execute(
+                "INSERT INTO policy_state_history (consecutivo, old_estado, new_estado, usuario, fecha) "
+                "SELECT consecutivo, NULL, estado, usuario, COALESCE(fecha, ?) FROM policy_states ORDER BY fecha",
+                (datetime.now().isoformat(),)
+            )
+            self._set_meta('history_seeded', datetime.now().isoformat())
+
+    def _set_meta(self, key: str, value: str):
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    @contextmanager
+    def _transaction(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _record_history(self, states: dict, changes: dict):
+        """Append (consecutivo, old, new, usuario, fecha) rows; changes values are states or None (deleted)"""
+        fecha = datetime.now().isoformat()
+        rows = []
+        for consecutivo, state in changes.items():
+            old = states.get(consecutivo)
+            rows.append((
+                consecutivo,
+                old.get("estado") if old else None,
+                state.get("estado") if state else None,
+                (state or {}).get("usuario") or (old or {}).get("usuario"),
+                (state or {}).get("fecha") or fecha,
+            ))
+        self._conn.executemany(
+            "INSERT INTO policy_state_history (consecutivo, old_estado, new_estado, usuario, fecha) VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+
+    def _upsert_many(self, states: dict):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO policy_states (consecutivo, estado, fecha, usuario) VALUES (?, ?, ?, ?)",
+            [(str(c), s.get("estado") or "", s.get("fecha"), s.get("usuario")) for c, s in states.items()]
+        )
+
+    def _reload_if_changed(self) -> bool:
+        """Reload the states if another process committed to the database (call with self._lock held)"""
+        version = self._data_version()
+        if version == self._db_version:
+            return False
+        self._states = self._load_states()
+        self._db_version = version
+        return True
+
+    def _reloaded(self, reloaded: bool):
+        """Announce a reload; called without self._lock, since subscribers take their own locks"""
+        if reloaded:
+            data_versions.bump_version(data_versions.POLICY_STATES)
+
+    def refresh(self) -> bool:
+        """Reload the states if another process committed to the database; True if reloaded"""
+        with self._lock:
+            reloaded = self._reload_if_changed()
+        self._reloaded(reloaded)
+        return reloaded
+
+    def _read_states(self) -> dict:
+        """In-memory states, reloaded only if another process committed to the database"""
+        self.refresh()
+        return self._states
+
+    # ==================== API ====================
+
+    def add_listener(self, callback):
+        """
+        Register callback(changes, version) called after each save/delete, where changes
+        is {consecutivo: state_or_None}. A bulk save produces a single call (one version bump)
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, changes: dict):
+        version = data_versions.bump_version(data_versions.POLICY_STATES)
+        for callback in self._listeners:
+            try:
+                callback(changes, version)
+            except Exception as e:
+                print(f"[POLICY-STATES] Listener error: {e}")
+
     def save_state(self, consecutivo: str, estado: str, usuario: str = "Sistema"):
         """Save or update a policy state"""
-        states = self._read_states()
-        states[consecutivo] = {
+        state = {
             "estado": estado,
             "fecha": datetime.now().isoformat(),
             "usuario": usuario
         }
-        self._write_states(states)
-        return states[consecutivo]
-    
+        with self._lock:
+            reloaded = self._reload_if_changed()
+            states = self._states
+            with self._transaction():
+                self._record_history(states, {consecutivo: state})
+                self._upsert_many({consecutivo: state})
+            # Copy-on-write: readers keep the dict they got, writes publish a new one
+            self._states = {**states, consecutivo: state}
+        self._reloaded(reloaded)
+        self._notify({consecutivo: state})
+        return state
+
+    def save_states(self, items, usuario: str = "Sistema") -> list:
+        """
+        Save many (consecutivo, estado) pairs in one transaction with a single
+        notification. Returns one result per item, in order
+        """
+        fecha = datetime.now().isoformat()
+        results = []
+        changes = {}
+        for consecutivo, estado in items:
+            consecutivo = str(consecutivo or '').strip()
+            if not consecutivo:
+                results.append({"consecutivo": consecutivo, "success": False, "error": "Consecutivo vacío"})
+                continue
+            state = {"estado": estado, "fecha": fecha, "usuario": usuario}
+            changes[consecutivo] = state
+            results.append({"consecutivo": consecutivo, "success": True, "data": state})
+        if not changes:
+            return results
+
+        with self._lock:
+            reloaded = self._reload_if_changed()
+            states = self._states
+            with self._transaction():
+                self._record_history(states, changes)
+                self._upsert_many(changes)
+            self._states = {**states, **changes}
+        self._reloaded(reloaded)
+        self._notify(changes)
+        return results
+
     def get_state(self, consecutivo: str) -> Optional[dict]:
         """Get state for a specific policy"""
-        states = self._read_states()
-        return states.get(consecutivo)
-    
-    def get_all_states(self) -> dict:
-        """Get all policy states"""
-        return self._read_states()
-    
+        return self._read_states().get(consecutivo)
+
+    def get_all_states(self, refresh: bool = True) -> dict:
+        """
+        Snapshot of all policy states; never mutated afterwards (writes publish a new dict).
+        refresh=False skips the cross-process check (for callers holding their own locks)
+        """
+        return self._read_states() if refresh else self._states
+
     def delete_state(self, consecutivo: str):
         """Delete a policy state"""
-        states = self._read_states()
-        if consecutivo in states:
-            del states[consecutivo]
-            self._write_states(states)
-            return True
-        return False
+        with self._lock:
+            reloaded = self._reload_if_changed()
+            states = self._states
+            found = consecutivo in states
+            if found:
+                with self._transaction():
+                    self._record_history(states, {consecutivo: None})
+                    self._conn.execute("DELETE FROM policy_states WHERE consecutivo = ?", (consecutivo,))
+                states = dict(states)
+                del states[consecutivo]
+                self._states = states
+        self._reloaded(reloaded)
+        if not found:
+            return False
+        self._notify({consecutivo: None})
+        return True
+
+    # ==================== HISTORY ====================
+
+    def _query(self, sql: str, params=()) -> list:
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def get_history(self, consecutivo: str) -> list:
+        """Transitions of one policy, oldest first"""
+        return self._query(
+            "SELECT consecutivo, old_estado, new_estado, usuario, fecha FROM policy_state_history "
+            "WHERE consecutivo = ? ORDER BY fecha, id", (consecutivo,)
+        )
+
+    def get_transitions(self, usuario: str = None, desde: str = None, hasta: str = None, limit: int = 1000) -> list:
+        """Transitions in [desde, hasta] (ISO strings), optionally by user, newest first"""
+        where, params = [], []
+        if usuario:
+            where.append("usuario = ?")
+            params.append(usuario)
+        if desde:
+            where.append("fecha >= ?")
+            params.append(desde)
+        if hasta:
+            where.append("fecha <= ?")
+            params.append(hasta)
+        sql = "SELECT consecutivo, old_estado, new_estado, usuario, fecha FROM policy_state_history"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return self._query(sql + " ORDER BY fecha DESC, id DESC LIMIT ?", (*params, limit))
+
+    def get_history_stamp(self) -> int:
+        """Id of the last history row: changes with every save/delete and survives restarts"""
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM policy_state_history").fetchone()[0]
+
+    def get_states_as_of(self, as_of: str) -> dict:
+        """{consecutivo: state} as it was at as_of (ISO string); deleted states are omitted"""
+        rows = self._query(
+            "SELECT consecutivo, new_estado, usuario, fecha, MAX(id) FROM policy_state_history "
+            "WHERE fecha <= ? GROUP BY consecutivo", (as_of,)
+        )
+        return {r["consecutivo"]: {"estado": r["new_estado"], "fecha": r["fecha"], "usuario": r["usuario"]}
+                for r in rows if r["new_estado"] is not None}
 
 # Global instance
 policy_state_manager = PolicyStateManager()
+data_versions.register_refresher(data_versions.POLICY_STATES, policy_state_manager.refresh)
@@ -0,0 +1,26 @@
+"""
+Proyección de campos (fields=) para endpoints de listas: solo se serializan las
+columnas pedidas, así el tamaño del payload y el tiempo de codificación escalan
+con los campos realmente mostrados.
+"""
+
+def parse_fields(fields: str):
+    """'POLIZA, REGIONAL' -> ['POLIZA', 'REGIONAL'] (sin duplicados); None/'' -> None (todos)."""
+    if not fields:
+        return None
+    result = []
+    for name in fields.split(','):
+        name = name.strip()
+        if name and name not in result:
+            result.append(name)
+    return result or None
+
+def project(records, fields):
+    """Nuevos dicts con solo `fields` (None si la clave no existe); sin fields retorna records tal cual."""
+    if not fields:
+        return records
+    return [{f: r.get(f) for f in fields} for r in records]
+
+def fields_key(fields) -> str:
+    """Clave estable para cachés de respuesta."""
+    return ','.join(fields) if fields else ''
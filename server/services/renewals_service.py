@@ -0,0 +1,55 @@
+"""
+Servicio de Renovaciones (hoja 'A&A' de SEGUIMIENTO CANCELACIONES).
+Mantiene los registros en memoria y los recarga solo si el Excel cambia.
+"""
+import os
+import threading
+from datetime import datetime
+from services import data_versions
+from services.canonical import canonical_records
+
+RENEWALS = 'renewals'
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+EXCEL_FILE = os.path.join(BASE_DIR, "SEGUIMIENTO CANCELACIONES 2025 (1) (1).xlsx")
+SHEET_NAME = 'A&A'
+
+_renewals_cache = {'data': None, 'loaded': False, 'timestamp': None, 'mtime': None}
+_lock = threading.Lock()
+
+def _file_mtime():
+    try:
+        return os.stat(EXCEL_FILE).st_mtime
+    except OSError:
+        return None
+
+def load_renewals_data():
+    """Retorna los registros de renovaciones (lee el Excel solo si cambió)."""
+    mtime = _file_mtime()
+    if _renewals_cache['loaded'] and _renewals_cache['mtime'] == mtime:
+        return _renewals_cache['data']
+
+    with _lock:
+        if _renewals_cache['loaded'] and _renewals_cache['mtime'] == mtime:
+            return _renewals_cache['data']
+        try:
+            import pandas as pd
+
+            print(f"[RENEWALS] Reading: {EXCEL_FILE}")
+            df = pd.read_excel(EXCEL_FILE, sheet_name=SHEET_NAME)
+            # Valores JSON-safe una sola vez al cargar (nulos, fechas ISO, floats finitos)
+            data = canonical_records(df)
+
+            _renewals_cache['data'] = data
+            _renewals_cache['loaded'] = True
+            _renewals_cache['mtime'] = mtime
+            _renewals_cache['timestamp'] = datetime.now().isoformat()
+            data_versions.bump_version(RENEWALS)
+            return data
+        except Exception as e:
+            print(f"[RENEWALS] Error: {e}")
+            return []
+
+def get_renewals_source_version():
+    """Versión de la fuente sin cargarla: cambia si el Excel fue modificado."""
+    return (_file_mtime(), data_versions.get_version(RENEWALS))
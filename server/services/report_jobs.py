@@ -0,0 +1,201 @@
+"""
+Reportes XLSX (Forecast, Dashboard y Pendientes por responsable) generados por un
+worker en segundo plano con el escritor write-only de openpyxl (memoria constante:
+las filas se escriben a medida que se generan). El archivo se guarda en disco y
+se reutiliza mientras no cambie la generación de los datos de los que depende.
+"""
+import hashlib
+import os
+import queue
+import threading
+import time
+from datetime import date, datetime
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+from services.unified_data_processor import BASE_DIR, get_forecast_data, get_snapshot_stamp
+from services.forecast_metas_service import get_metas_stamp
+from services.policy_state_manager import policy_state_manager
+from services.dashboard_stats import build_dashboard_stats
+from services.cobros_index import get_cobros_summary, get_cobros_items, mapping_stamp
+
+REPORTS_DIR = BASE_DIR / ".reports"
+ITEMS_PAGE_SIZE = 500
+
+_jobs = {}
+_lock = threading.Lock()
+_queue = queue.Queue()
+_worker = {'thread': None}
+
+FORECAST_COLUMNS = ['Nombre', 'Meta', 'Real', 'Cumplimiento', 'Forecast', 'Forecast_Pct', 'Faltante']
+PERCENT_COLUMNS = ('Cumplimiento', 'Forecast_Pct')
+ALERT_COLUMNS = ['CONSECUTIVO', 'POLIZA', 'ASEGURADO', 'REGIONAL', 'FECHA_EXPEDICION', 'dias_pendiente', 'PRIMA_TOTAL_USD']
+ITEM_COLUMNS = ['responsable', 'CONSECUTIVO', 'POLIZA', 'ASEGURADO', 'REGIONAL', 'FECHA_EXPEDICION', 'dias_mora', 'valor_usd']
+
+def _report_key(year: int, month: int) -> str:
+    """
+    Clave por contenido de las fuentes (snapshot, estados, metas, mapeo y día), no por
+    contadores del proceso: un reporte generado antes de reiniciar se sigue reutilizando.
+    """
+    stamps = (get_snapshot_stamp(), policy_state_manager.get_history_stamp(), get_metas_stamp(), mapping_stamp())
+    raw = repr((year, month, stamps, date.today().isoformat()))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+def _report_path(year: int, month: int, key: str):
+    return REPORTS_DIR / f"reporte_{year}_{month:02d}_{key}.xlsx"
+
+# ==================== ESCRITURA ====================
+
+def _bold_row(ws, values):
+    row = []
+    for value in values:
+        cell = WriteOnlyCell(ws, value=value)
+        cell.font = Font(bold=True)
+        row.append(cell)
+    return row
+
+def _write_forecast(wb, year, month):
+    ws = wb.create_sheet('Forecast')
+    ws.append(_bold_row(ws, FORECAST_COLUMNS))
+    for record in get_forecast_data(year, month) or []:
+        if not record:
+            ws.append([])
+            continue
+        row = []
+        for col in FORECAST_COLUMNS:
+            cell = WriteOnlyCell(ws, value=record.get(col))
+            if col in PERCENT_COLUMNS:
+                cell.number_format = '0.0%'
+            elif col != 'Nombre':
+                cell.number_format = '#,##0.00'
+            if record.get('is_total'):
+                cell.font = Font(bold=True)
+            row.append(cell)
+        ws.append(row)
+
+def _write_dashboard(wb, year, month):
+    ws = wb.create_sheet('Dashboard')
+    stats = build_dashboard_stats(year, month)
+    ws.append(_bold_row(ws, ['Indicador', 'Valor']))
+    for key, value in (stats.get('summary') or {}).items():
+        ws.append([key, value])
+
+    alerts = (stats.get('alerts') or {}).get('pendientes_20_dias_list') or []
+    ws.append([])
+    ws.append(_bold_row(ws, [f"Pendientes > 20 días ({len(alerts)})"]))
+    ws.append(_bold_row(ws, ALERT_COLUMNS))
+    for record in alerts:
+        ws.append([record.get(col) for col in ALERT_COLUMNS])
+
+def _write_cobros(wb):
+    summary = get_cobros_summary()
+    ws = wb.create_sheet('Pendientes por responsable')
+    ws.append(_bold_row(ws, ['Responsable', 'Pólizas', 'Total USD']))
+    for group in summary['data']:
+        ws.append([group['responsable'], group['count'], group['total_usd']])
+    ws.append(_bold_row(ws, ['TOTAL', summary['total_count'], summary['total_global_usd']]))
+
+    # Detalle por páginas: nunca se materializan todos los items a la vez
+    detail = wb.create_sheet('Pendientes detalle')
+    detail.append(_bold_row(detail, ITEM_COLUMNS))
+    for group in summary['data']:
+        page = 1
+        while True:
+            result = get_cobros_items(group['responsable'], page, ITEMS_PAGE_SIZE, 'prima')
+            for item in result['data']:
+                detail.append([group['responsable']] + [item.get(col) for col in ITEM_COLUMNS[1:]])
+            if page >= result['pagination']['total_pages']:
+                break
+            page += 1
+
+def _generate(year, month, path):
+    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    wb = Workbook(write_only=True)
+    _write_forecast(wb, year, month)
+    _write_dashboard(wb, year, month)
+    _write_cobros(wb)
+    tmp_path = path.with_suffix('.tmp')
+    wb.save(tmp_path)
+    os.replace(tmp_path, path)
+
+    # Quitar versiones anteriores del mismo reporte
+    for old in REPORTS_DIR.glob(f"reporte_{year}_{month:02d}_*.xlsx"):
+        if old != path:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+# ==================== WORKER ====================
+
+def _run_worker():
+    while True:
+        job_id = _queue.get()
+        job = _jobs.get(job_id)
+        if job is None:
+            continue
+        job['status'] = 'running'
+        start = time.perf_counter()
+        try:
+            _generate(job['year'], job['month'], job['path'])
+            job['status'] = 'done'
+            print(f"[REPORTS] Reporte {job['year']}-{job['month']:02d} generado en {time.perf_counter() - start:.1f}s")
+        except Exception as e:
+            job['status'] = 'error'
+            job['error'] = str(e)
+            print(f"[REPORTS] Error generando reporte: {e}")
+        finally:
+            job['finished_at'] = datetime.now().isoformat()
+
+def _ensure_worker():
+    with _lock:
+        thread = _worker['thread']
+        if thread is None or not thread.is_alive():
+            thread = threading.Thread(target=_run_worker, name='report-worker', daemon=True)
+            thread.start()
+            _worker['thread'] = thread
+
+def _public(job) -> dict:
+    result = {k: v for k, v in job.items() if k != 'path'}
+    result['filename'] = job['path'].name
+    return result
+
+def request_report(year: int, month: int) -> dict:
+    """
+    Encola (o reutiliza) el reporte del mes. Si ya existe en disco para la generación
+    actual de los datos, retorna el job terminado sin regenerar.
+    """
+    key = _report_key(year, month)
+    path = _report_path(year, month, key)
+    with _lock:
+        job = _jobs.get(key)
+        if job is not None and job['status'] in ('pending', 'running', 'done'):
+            if job['status'] != 'done' or path.exists():
+                return _public(job)
+        job = {
+            'id': key, 'year': year, 'month': month, 'path': path,
+            'status': 'done' if path.exists() else 'pending',
+            'created_at': datetime.now().isoformat(), 'finished_at': None, 'error': None,
+        }
+        # Jobs terminados de generaciones anteriores del mismo mes ya no sirven
+        for old_key in [k for k, j in _jobs.items()
+                        if (j['year'], j['month']) == (year, month) and j['status'] in ('done', 'error')]:
+            del _jobs[old_key]
+        _jobs[key] = job
+    if job['status'] == 'pending':
+        _ensure_worker()
+        _queue.put(key)
+    return _public(job)
+
+def get_job(job_id: str):
+    job = _jobs.get(job_id)
+    return _public(job) if job else None
+
+def get_report_file(job_id: str):
+    """Ruta del XLSX de un job terminado, o None."""
+    job = _jobs.get(job_id)
+    if job is None or job['status'] != 'done' or not job['path'].exists():
+        return None
+    return job['path']
@@ -0,0 +1,128 @@
+"""
+Caché de respuestas de endpoints de lectura, guardadas ya serializadas (bytes JSON).
+La clave incluye ruta, parámetros y las versiones de las fuentes de las que depende
+la respuesta (data_versions); al cambiar una fuente se eliminan exactamente las
+entradas que dependen de ella. Presupuesto de memoria en bytes con desalojo LRU.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+from fastapi import Response
+
+from services import data_versions
+from services.fast_json import dumps as serialize
+
+MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+class ResponseCache:
+    """LRU de respuestas serializadas con invalidación por fuente de datos."""
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()   # key -> (body, sources)
+        self._by_source = {}            # fuente -> set(keys)
+        self._subscribed = set()
+        self._lock = threading.Lock()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, body: bytes, sources, versions):
+        """Guarda la respuesta solo si las fuentes no cambiaron mientras se calculaba."""
+        if len(body) > self.max_bytes:
+            return
+        for source in sources:
+            self._subscribe(source)
+        # Refrescar fuera del lock: un refresco puede invalidar (y tomar el lock) vía bump_version
+        if data_versions.get_versions(*sources) != versions:
+            return
+        with self._lock:
+            if data_versions.get_versions(*sources, refresh=False) != versions:
+                return
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = (body, tuple(sources))
+            self.size_bytes += len(body)
+            for source in sources:
+                self._by_source.setdefault(source, set()).add(key)
+            while self.size_bytes > self.max_bytes and self._entries:
+                self._discard(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _discard(self, key):
+        body, sources = self._entries.pop(key)
+        self.size_bytes -= len(body)
+        for source in sources:
+            keys = self._by_source.get(source)
+            if keys is not None:
+                keys.discard(key)
+
+    def _subscribe(self, source):
+        if source in self._subscribed:
+            return
+        with self._lock:
+            if source in self._subscribed:
+                return
+            self._subscribed.add(source)
+        data_versions.subscribe(source, self._on_version_change)
+
+    def _on_version_change(self, source, version):
+        with self._lock:
+            keys = list(self._by_source.get(source, ()))
+            for key in keys:
+                if key in self._entries:
+                    self._discard(key)
+            self.invalidations += len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_source.clear()
+            self.size_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'size_bytes': self.size_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 3) if total else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+response_cache = ResponseCache()
+
+def cached_json_response(route: str, params: dict, sources, builder, headers: dict = None) -> Response:
+    """
+    Retorna la respuesta cacheada de (route, params, versiones de sources) o la construye
+    con builder() -> payload, la serializa y la guarda. headers se agregan a la respuesta
+    (p. ej. ETag / Cache-Control de http_cache.conditional).
+    """
+    sources = tuple(sources)
+    versions = data_versions.get_versions(*sources)
+    key = (route, tuple(sorted(params.items())), versions)
+
+    body = response_cache.get(key)
+    status = "HIT"
+    if body is None:
+        body = serialize(builder())
+        response_cache.put(key, body, sources, versions)
+        status = "MISS"
+    return Response(content=body, media_type="application/json", headers={**(headers or {}), "X-Cache": status})
@@ -0,0 +1,183 @@
+"""
+Índice invertido para búsqueda de texto libre (ASEGURADO, POLIZA, CONSECUTIVO).
+Se construye una vez por generación del snapshot unificado y responde consultas
+con coincidencia por prefijo (edge n-grams) y sin distinguir tildes.
+"""
+import heapq
+import re
+import time
+import unicodedata
+from array import array
+
+from services.unified_data_processor import get_snapshot_derived, get_snapshot_generation
+
+MIN_PREFIX = 2
+MAX_PREFIX = 20
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+def fold_text(value) -> str:
+    """Minúsculas, sin tildes y sin signos de puntuación (espacios normalizados)."""
+    if value is None:
+        return ''
+    s = unicodedata.normalize('NFKD', str(value))
+    s = ''.join(ch for ch in s if not unicodedata.combining(ch)).lower()
+    return _NON_ALNUM.sub(' ', s).strip()
+
+def tokenize(value) -> list:
+    """Divide un texto en tokens normalizados."""
+    folded = fold_text(value)
+    if not folded or folded in ('nan', 'none'):
+        return []
+    return folded.split()
+
+def normalize_policy_key(value) -> str:
+    """
+    Normaliza un número de póliza/consecutivo para compararlo entre fuentes:
+    quita el '.0' de floats de Excel, signos, espacios y ceros a la izquierda.
+    """
+    if value is None:
+        return ''
+    s = str(value).strip()
+    if s.lower() in ('', 'nan', 'none'):
+        return ''
+    if s.endswith('.0') and s[:-2].isdigit():
+        s = s[:-2]
+    s = fold_text(s).replace(' ', '')
+    return s.lstrip('0') or s
+
+class InvertedIndex:
+    """
+    Índice invertido genérico: término (prefijo de token) -> lista de documentos.
+    Cada documento guarda sus tokens por campo para calcular el ranking y un
+    payload pequeño que se retorna como resultado.
+    """
+
+    def __init__(self, id_fields=(), text_fields=()):
+        self.id_fields = tuple(id_fields)
+        self.text_fields = tuple(text_fields)
+        self.postings = {}
+        self.docs = []
+
+    def add(self, fields: dict, payload, rank=0) -> int:
+        """Agrega un documento y retorna su id interno."""
+        doc_id = len(self.docs)
+        doc_terms = {}
+        for name in self.id_fields:
+            key = normalize_policy_key(fields.get(name))
+            doc_terms[name] = [key] if key else []
+        for name in self.text_fields:
+            doc_terms[name] = tokenize(fields.get(name))
+
+        self.docs.append((doc_terms, payload, rank))
+
+        seen = set()
+        for tokens in doc_terms.values():
+            for token in tokens:
+                for n in range(MIN_PREFIX, min(len(token), MAX_PREFIX) + 1):
+                    seen.add(token[:n])
+        for term in seen:
+            bucket = self.postings.get(term)
+            if bucket is None:
+                bucket = self.postings[term] = array('i')
+            bucket.append(doc_id)
+        return doc_id
+
+    def _score(self, doc_terms, query_tokens) -> float:
+        score = 0.0
+        for q in query_tokens:
+            best = 0.0
+            for name in self.id_fields:
+                for key in doc_terms[name]:
+                    if key == q:
+                        best = max(best, 10.0)
+                    elif key.startswith(q):
+                        best = max(best, 4.0 + len(q) / len(key))
+            for name in self.text_fields:
+                for token in doc_terms[name]:
+                    if token == q:
+                        best = max(best, 5.0)
+                    elif token.startswith(q):
+                        best = max(best, 2.0 + len(q) / len(token))
+            score += best
+        return score
+
+    def search(self, query: str, limit: int = 20):
+        """
+        Busca documentos que contengan TODOS los tokens de la consulta (como prefijo).
+        Retorna (total_coincidencias, [(score, payload), ...]) ordenado por relevancia.
+        """
+        query_tokens = []
+        for token in tokenize(query):
+            q = normalize_policy_key(token) if token.isdigit() else token
+            if len(q) >= MIN_PREFIX:
+                query_tokens.append(q[:MAX_PREFIX])
+        if not query_tokens:
+            return 0, []
+
+        # Intersección empezando por la lista de postings más corta
+        lists = []
+        for q in query_tokens:
+            bucket = self.postings.get(q)
+            if not bucket:
+                return 0, []
+            lists.append(bucket)
+        lists.sort(key=len)
+
+        candidates = set(lists[0])
+        for bucket in lists[1:]:
+            candidates.intersection_update(bucket)
+            if not candidates:
+                return 0, []
+
+        scored = (
+            (self._score(self.docs[d][0], query_tokens), self.docs[d][2], d)
+            for d in candidates
+        )
+        top = heapq.nlargest(limit, scored)
+        return len(candidates), [(score, self.docs[d][1]) for score, _, d in top]
+
+# ==================== ÍNDICE DEL SNAPSHOT UNIFICADO ====================
+
+HIT_FIELDS = ['CONSECUTIVO', 'POLIZA', 'ASEGURADO', 'REGIONAL', 'ESTADO', 'PRODUCTO',
+              'AÑO', 'MES', 'FECHA_EXPEDICION', 'PRIMA_TOTAL_USD']
+
+def _build_snapshot_index(cache) -> InvertedIndex:
+    start = time.perf_counter()
+    index = InvertedIndex(id_fields=('CONSECUTIVO', 'POLIZA'), text_fields=('ASEGURADO',))
+    for row_idx, record in enumerate(cache.get('todos') or []):
+        try:
+            rank = int(record.get('AÑO') or 0) * 100 + int(record.get('MES') or 0)
+        except (TypeError, ValueError):
+            rank = 0
+        index.add(record, row_idx, rank)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"[SEARCH] Índice construido: {len(index.docs)} registros, {len(index.postings)} términos ({elapsed:.0f} ms)")
+    return index
+
+def get_snapshot_index() -> InvertedIndex:
+    """Retorna el índice de búsqueda de la generación actual del snapshot."""
+    return get_snapshot_derived('search_index', _build_snapshot_index)
+
+def search_records(query: str, limit: int = 20) -> dict:
+    """Busca en el REPORTE unificado y retorna los top-N registros más relevantes."""
+    from services.unified_data_processor import get_all_records
+
+    start = time.perf_counter()
+    index = get_snapshot_index()
+    todos = get_all_records()
+    total, results = index.search(query, limit)
+
+    hits = []
+    for score, row_idx in results:
+        record = todos[row_idx]
+        hit = {k: record.get(k) for k in HIT_FIELDS}
+        hit['score'] = round(score, 3)
+        hits.append(hit)
+
+    return {
+        'data': hits,
+        'total': total,
+        'generation': get_snapshot_generation(),
+        'took_ms': round((time.perf_counter() - start) * 1000, 2)
+    }
@@ -0,0 +1,118 @@
+"""
+Overlay de estado final (RECAUDADA / ANULADA / PENDIENTE) alineado con las filas
+del snapshot unificado. Se construye una vez por generación y se parchea en sitio
+cuando se guarda un estado, para que Dashboard y Cobros no re-deriven el estado
+por registro ni lean policy_states.json en cada request.
+"""
+import threading
+
+from services import data_versions
+from services.policy_state_manager import policy_state_manager
+from services.unified_data_processor import get_snapshot_derived, peek_snapshot_derived
+
+PENDIENTE, RECAUDADA, ANULADA = 0, 1, 2
+FINAL_STATES = ('PENDIENTE', 'RECAUDADA', 'ANULADA')
+
+_lock = threading.Lock()
+_listeners = []
+
+def classify_estado(estado: str) -> int:
+    """Clasifica un texto de estado (Excel o guardado) en un código de estado final."""
+    estado = str(estado or '').upper()
+    if 'RECAUD' in estado or 'PAGAD' in estado:
+        return RECAUDADA
+    if 'ANULAD' in estado or 'CANCEL' in estado:
+        return ANULADA
+    return PENDIENTE
+
+def resolve_final_state(record: dict, saved_state) -> int:
+    """El estado guardado por el usuario tiene prioridad sobre el ESTADO del Excel."""
+    if saved_state and isinstance(saved_state, dict):
+        return classify_estado(saved_state.get('estado', ''))
+    return classify_estado(record.get('ESTADO', ''))
+
+class FinalStateOverlay:
+    """codes[i] es el estado final de todos[i]; positions agrupa filas por consecutivo."""
+
+    def __init__(self, todos):
+        self.todos = todos
+        self.codes = bytearray(len(todos))
+        self.positions = {}
+        for pos, record in enumerate(todos):
+            self.positions.setdefault(str(record.get('CONSECUTIVO', '')), []).append(pos)
+        self.state_version = -1
+        self.resync()
+
+    def resync(self):
+        """
+        Recalcula todos los estados desde el almacén de estados guardados (O(n)).
+        Se llama con locks tomados: no refresca (get_final_state_overlay refresca antes).
+        """
+        version = data_versions.get_version(data_versions.POLICY_STATES, refresh=False)
+        saved_states = policy_state_manager.get_all_states(refresh=False)
+        for pos, record in enumerate(self.todos):
+            saved = saved_states.get(str(record.get('CONSECUTIVO', '')))
+            self.codes[pos] = resolve_final_state(record, saved)
+        self.state_version = version
+
+    def patch(self, consecutivo: str, saved_state) -> list:
+        """Actualiza en sitio las filas de un consecutivo; retorna [(pos, viejo, nuevo)]."""
+        changes = []
+        for pos in self.positions.get(str(consecutivo), []):
+            old = self.codes[pos]
+            new = resolve_final_state(self.todos[pos], saved_state)
+            if old != new:
+                self.codes[pos] = new
+                changes.append((pos, old, new))
+        return changes
+
+    def state_name(self, pos: int) -> str:
+        return FINAL_STATES[self.codes[pos]]
+
+def _build_overlay(cache):
+    with _lock:
+        return FinalStateOverlay(cache.get('todos') or [])
+
+def get_final_state_overlay() -> FinalStateOverlay:
+    """Overlay de la generación actual, sincronizado con los estados guardados."""
+    # Cambios de otros procesos se detectan aquí, antes de tomar cualquier lock
+    version = data_versions.get_version(data_versions.POLICY_STATES)
+    overlay = get_snapshot_derived('final_state_overlay', _build_overlay)
+    if overlay.state_version != version:
+        with _lock:
+            if overlay.state_version != data_versions.get_version(data_versions.POLICY_STATES, refresh=False):
+                overlay.resync()
+                _notify(overlay, None)
+    return overlay
+
+def add_listener(callback):
+    """
+    Registra callback(overlay, changes) para estructuras derivadas del overlay.
+    changes es [(pos, viejo, nuevo)] tras un parche, o None tras una resincronización completa.
+    """
+    _listeners.append(callback)
+
+def _notify(overlay, changes):
+    for callback in _listeners:
+        try:
+            callback(overlay, changes)
+        except Exception as e:
+            print(f"[STATE-OVERLAY] Error notificando cambio: {e}")
+
+def _on_state_saved(saved_changes, version):
+    with _lock:
+        overlay = peek_snapshot_derived('final_state_overlay')
+        if overlay is None:
+            return
+        # Solo parchear si el overlay estaba al día; si no, el próximo lector resincroniza
+        if overlay.state_version != version - 1:
+            return
+        changes = []
+        for consecutivo, saved_state in saved_changes.items():
+            changes.extend(overlay.patch(consecutivo, saved_state))
+        overlay.state_version = version
+        # Un guardado masivo produce una sola notificación a los índices derivados
+        if changes:
+            _notify(overlay, changes)
+
+policy_state_manager.add_listener(_on_state_saved)
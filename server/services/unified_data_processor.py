@@ -4,10 +4,12 @@ Reemplaza: data_processor.py, negocios_nuevos_processor.py, mock_sheets.py (parc
 """
 import pandas as pd
 import json
-import os
 from datetime import datetime
 from pathlib import Path
+import threading
 import numpy as np
+from services import data_versions
+from services.estados_bolivar import merge_estados
 
 # Rutas
 # Usamos ruta relativa desde 'services/' para ser compatibles con Docker y Local
@@ -29,6 +31,10 @@ _unified_cache = {
     'data': None
 }
 
+# Estructuras derivadas del snapshot (índices, DataFrames), invalidadas por generación
+_derived_cache = {}
+_derived_lock = threading.RLock()   # reentrante: un builder puede usar otra estructura derivada
+
 def clean_currency_value(value):
     """
     Convierte valores monetarios a float.
@@ -472,6 +478,49 @@ def convert_excel_to_unified_cache():
     print("=" * 60)
     return cache_data
 
+def _set_snapshot(data):
+    """Publica un nuevo snapshot en memoria e incrementa su generación."""
+    _unified_cache['data'] = data
+    _unified_cache['loaded'] = True
+    data_versions.bump_version(data_versions.SNAPSHOT)
+    return data
+
+def get_snapshot_generation():
+    """Retorna la generación del snapshot unificado actualmente en memoria."""
+    return data_versions.get_version(data_versions.SNAPSHOT)
+
+def get_snapshot_stamp():
+    """Marca del snapshot cargado (fecha de conversión + total), estable entre reinicios."""
+    cache = load_unified_cache() or {}
+    return (cache.get('timestamp'), cache.get('total_registros'))
+
+def get_snapshot_derived(key, builder):
+    """
+    Retorna una estructura derivada del snapshot (índice, DataFrame, etc.).
+    Se construye con builder(cache) una sola vez por generación.
+    """
+    cache = load_unified_cache()
+    generation = get_snapshot_generation()
+
+    entry = _derived_cache.get(key)
+    if entry and entry[0] == generation:
+        return entry[1]
+
+    with _derived_lock:
+        entry = _derived_cache.get(key)
+        if entry and entry[0] == generation:
+            return entry[1]
+        value = builder(cache)
+        _derived_cache[key] = (generation, value)
+        return value
+
+def peek_snapshot_derived(key):
+    """Retorna la estructura derivada de la generación actual si ya existe (sin construirla)."""
+    entry = _derived_cache.get(key)
+    if entry and entry[0] == get_snapshot_generation():
+        return entry[1]
+    return None
+
 def load_unified_cache():
     """
     Carga caché unificado. Si no existe o está desactualizado, lo regenera.
@@ -480,7 +529,6 @@ def load_unified_cache():
     
     # Si ya está en memoria, retornar (Validando que sea datos reales)
     if _unified_cache['loaded'] and _unified_cache['data'] is not None:
-        print("[UNIFIED] Usando caché en memoria")
         return _unified_cache['data']
     
     # Si estaba loaded pero data es None, resetear flag
@@ -489,10 +537,7 @@ def load_unified_cache():
     # Verificar si existe caché en disco
     if not CACHE_FILE.exists():
         print("[UNIFIED] Caché no existe. Generando...")
-        data = convert_excel_to_unified_cache()
-        _unified_cache['data'] = data
-        _unified_cache['loaded'] = True
-        return data
+        return _set_snapshot(convert_excel_to_unified_cache())
     
     # Verificar si Excel es más reciente que caché
     if EXCEL_FILE.exists():
@@ -501,10 +546,7 @@ def load_unified_cache():
         
         if excel_mtime > cache_mtime:
             print("[UNIFIED] Excel modificado. Regenerando caché...")
-            data = convert_excel_to_unified_cache()
-            _unified_cache['data'] = data
-            _unified_cache['loaded'] = True
-            return data
+            return _set_snapshot(convert_excel_to_unified_cache())
     
     # Cargar caché existente
     try:
@@ -515,15 +557,10 @@ def load_unified_cache():
         age_hours = (datetime.now() - timestamp).total_seconds() / 3600
         
         print(f"[UNIFIED] Caché cargado ({age_hours:.1f}h antiguo, {data['total_registros']} registros)")
-        _unified_cache['data'] = data
-        _unified_cache['loaded'] = True
-        return data
+        return _set_snapshot(data)
     except Exception as e:
         print(f"[UNIFIED] Error leyendo caché: {e}. Regenerando...")
-        data = convert_excel_to_unified_cache()
-        _unified_cache['data'] = data
-        _unified_cache['loaded'] = True
-        return data
+        return _set_snapshot(convert_excel_to_unified_cache())
 
 # ==================== FUNCIONES PARA NEGOCIOS NUEVOS ====================
 
@@ -556,11 +593,8 @@ def get_negocios_nuevos_months(year):
     
     return [month_names[m] for m in months_num if m in month_names]
 
-def get_negocios_nuevos_by_month(year, month_name):
-    """Retorna negocios filtrados por año y mes."""
-    cache = load_unified_cache()
-    
-    # Convertir nombre de mes a número
+def parse_month_name(month_name):
+    """Nombre de mes (ENERO / ENE) o número en texto -> número de mes, o None."""
     month_map = {
         'ENERO': 1, 'FEBRERO': 2, 'MARZO': 3, 'ABRIL': 4,
         'MAYO': 5, 'JUNIO': 6, 'JULIO': 7, 'AGOSTO': 8,
@@ -569,7 +603,7 @@ def get_negocios_nuevos_by_month(year, month_name):
         'JUL': 7, 'AGO': 8, 'SEP': 9, 'OCT': 10, 'NOV': 11, 'DIC': 12
     }
     
-    month_num = month_map.get(month_name.upper())
+    month_num = month_map.get(str(month_name).upper())
     if not month_num:
         # Intentar mapeo inverso si month_name es número string
         try:
@@ -578,7 +612,13 @@ def get_negocios_nuevos_by_month(year, month_name):
                 month_num = val
         except:
             pass
-            
+    return month_num
+
+def get_negocios_nuevos_by_month(year, month_name):
+    """Retorna negocios filtrados por año y mes."""
+    cache = load_unified_cache()
+    
+    month_num = parse_month_name(month_name)
     if not month_num:
         return []
     
@@ -612,22 +652,8 @@ def get_consecutivos_by_filters(year=None, month=None):
         else:
             consecutivos = [c for c in consecutivos if str(c.get('MES', '')).upper() == str(month).upper()]
 
-    # --- MERGE CON ESTADOS ACTUALIZADOS ---
-    try:
-        updated_states_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".consecutivos_estados.json")
-        if os.path.exists(updated_states_file):
-            with open(updated_states_file, 'r', encoding='utf-8') as f:
-                updated_states = json.load(f)
-            
-            # Sobreescribir estado si existe actualización
-            for c in consecutivos:
-                cons_id = str(c.get('Consecutivo', '')).strip()
-                if cons_id in updated_states and updated_states[cons_id]:
-                    c['Estado'] = updated_states[cons_id]
-    except Exception as e:
-        print(f"[UNIFIED] Error merging consolidated states: {e}")
-    
-    return consecutivos
+    # Estados Bolívar desde el overlay en memoria (copias; el snapshot no se modifica)
+    return merge_estados(consecutivos)
 
 # ==================== FUNCIONES PARA REPORTE PRINCIPAL ====================
 
@@ -653,29 +679,75 @@ def get_all_records_paginated(page=1, page_size=100):
         'total_pages': (len(todos) + page_size - 1) // page_size
     }
 
+def _build_consecutivos_dataframe(cache):
+    df = pd.DataFrame(cache.get('consecutivos') or [])
+    if df.empty:
+        return pd.DataFrame(columns=['Consecutivo', 'Localidad', 'Prima', 'Estado', 'AÑO', 'MES'])
+
+    # Columnas esperadas por main.py legacy: 'Consecutivo', 'Localidad', 'Prima', 'Estado'
+    if 'CONSECUTIVO' in df.columns: df['Consecutivo'] = df['CONSECUTIVO']
+    if 'LOCALIDAD' in df.columns: df['Localidad'] = df['LOCALIDAD']
+    if 'PRIMA' in df.columns:
+        df['Prima'] = df['PRIMA']
+    elif 'Prima' not in df.columns:
+        df['Prima'] = 0.0
+
+    # Tipos fijos: consecutivo como texto, año/mes enteros (0 = sin dato)
+    if 'Consecutivo' in df.columns:
+        df['Consecutivo'] = df['Consecutivo'].astype(str).str.strip()
+    for col in ['AÑO', 'MES']:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype('int64')
+        else:
+            df[col] = 0
+    return df
+
 def get_consecutivos_pendientes_dataframe():
     """
-    Retorna DataFrame de consecutivos para compatibilidad con main.py.
+    DataFrame tipado de consecutivos (AÑO/MES int64, Consecutivo str), una vez por generación.
+    Compartido entre llamadas: filtrar con las máscaras, no modificar en sitio.
     """
-    cache = load_unified_cache()
-    df = pd.DataFrame(cache['consecutivos'])
-    
-    # Asegurar columnas esperadas por el frontend/main.py legacy
-    if not df.empty:
-        # Renombrar para compatibilidad si es necesario o asegurar existencia
-        # El cache ya tiene keys: CONSECUTIVO, LOCALIDAD, REGIONAL, ...
-        # Main legacy espera: 'Consecutivo', 'Localidad', 'Prima', 'Estado'
-        
-        # Mapeo de nombres si el cache usa UPPERCASE
-        if 'CONSECUTIVO' in df.columns: df['Consecutivo'] = df['CONSECUTIVO']
-        if 'LOCALIDAD' in df.columns: df['Localidad'] = df['LOCALIDAD']
-        # Regional ya está en caché
-        
-        df['Prima'] = df['PRIMA'] if 'PRIMA' in df.columns else 0.0
-        # df['Estado'] = df['ESTADO'] # Ya existe
-        
+    return get_snapshot_derived('consecutivos_df', _build_consecutivos_dataframe)
+
+def consecutivos_month_mask(df, year: int, month: int):
+    """Máscara vectorizada de filas del año/mes dado."""
+    return (df['AÑO'] == int(year)) & (df['MES'] == int(month))
+
+def consecutivos_recent_mask(df, start_date):
+    """Máscara vectorizada de filas cuyo mes (AÑO/MES) es igual o posterior al mes de start_date."""
+    period = df['AÑO'] * 12 + (df['MES'] - 1)
+    valid = df['MES'].between(1, 12) & (df['AÑO'] > 0)
+    return valid & (period >= start_date.year * 12 + (start_date.month - 1))
+
+# ==================== SNAPSHOT COLUMNAR ====================
+
+# Columnas de texto con pocos valores distintos -> dtype category (códigos compactos)
+CATEGORICAL_COLUMNS = ['ESTADO', 'REGIONAL', 'LOCALIDAD', 'CORREDOR', 'PRODUCTO']
+# Columnas numéricas coercionadas (nulos/no numéricos -> 0) para agregar; difieren del registro original
+INT_COLUMNS = ['AÑO', 'MES']
+FLOAT_COLUMNS = ['PRIMA_TOTAL_USD', 'PRIMA_SIN_IVA_USD']
+COERCED_COLUMNS = INT_COLUMNS + FLOAT_COLUMNS
+
+def _build_todos_dataframe(cache):
+    df = pd.DataFrame(cache.get('todos') or [])
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    for col in INT_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype('int64')
+    for col in FLOAT_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0.0).astype('float64')
     return df
 
+def get_todos_dataframe():
+    """
+    Vista columnar (DataFrame) de 'todos', alineada fila a fila con la lista del snapshot.
+    Se construye una vez por generación; no debe modificarse en sitio.
+    """
+    return get_snapshot_derived('todos_df', _build_todos_dataframe)
+
 # ==================== CACHE MEMORIA ====================
 
 # Singleton para caché en memoria
@@ -733,6 +805,9 @@ def clear_all_caches():
     _df_cache['detalle'] = None
     _df_cache['consecutivos'] = None
     
+    # 4. Estructuras derivadas (índices por generación)
+    _derived_cache.clear()
+    
     print("[UNIFIED] Cachés limpiados.")
 
 
@@ -743,11 +818,9 @@ def get_forecast_data(year: int, month: str):
     Calcula el forecast para un mes específico usando la cache unificada.
     Reemplaza: data_processor.calculate_forecast_from_detalle
     """
-    cache = load_unified_cache()
-    if not cache or not cache.get('todos'):
+    df = get_todos_dataframe()
+    if df.empty:
         return []
-        
-    df = pd.DataFrame(cache['todos'])
     
     # 1. Normalizar mes objetivo (str/int -> int)
     month_map = {
@@ -779,7 +852,7 @@ def get_forecast_data(year: int, month: str):
         filtered_df = df[
             (df['AÑO'] == adjusted_year) & 
             (df['MES'] == target_month_num)
-        ].copy()
+        ]
     else:
         return []
         
@@ -794,11 +867,9 @@ def get_forecast_data(year: int, month: str):
         
     # 5. Agrupar por REGIONAL
     # En Unified, 'REGIONAL' ya está normalizada por get_regional()
-    grouped = filtered_df.groupby('REGIONAL')[val_col].sum().to_dict()
+    grouped = filtered_df.groupby('REGIONAL', observed=True)[val_col].sum().to_dict()
     
     # 6. Cargar Metas
-    saved_metas = {}
-    
     # Mapeo inverso de número a nombre corto para la key de metas (ej: "DIC 25")
     month_name_map = {
         1: 'ENE', 2: 'FEB', 3: 'MAR', 4: 'ABR', 5: 'MAY', 6: 'JUN',
@@ -808,14 +879,8 @@ def get_forecast_data(year: int, month: str):
     year_short = str(adjusted_year)[-2:]
     sheet_key = f"{month_short} {year_short}"
     
-    metas_path = PROJECT_ROOT / "server" / "data" / "forecast_metas.json"
-    if metas_path.exists():
-        try:
-            with open(metas_path, 'r', encoding='utf-8') as f:
-                all_metas = json.load(f)
-                saved_metas = all_metas.get(sheet_key, {})
-        except:
-            pass
+    from services.forecast_metas_service import get_sheet_metas
+    saved_metas = get_sheet_metas(sheet_key)
 
     # 7. Construir Estructura de Reporte (Grupos 1, 2, 3)
     # Helper local
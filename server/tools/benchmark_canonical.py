@@ -0,0 +1,86 @@
+"""
+Benchmark de la normalización JSON-safe (NaN/inf/fechas).
+Compara los recorridos por celda que se hacían antes en cada request (renovaciones,
+hojas genéricas, forecast) contra canonical_records, que se aplica una sola vez al
+cargar el dataset.
+
+Uso (desde server/):  python tools/benchmark_canonical.py [filas]
+"""
+import math
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.canonical import canonical_records, ISO_DATE
+
+def _frame(rows):
+    rng = np.random.default_rng(7)
+    prima = rng.normal(1000, 300, rows)
+    prima[rng.random(rows) < 0.1] = np.nan
+    prima[rng.random(rows) < 0.01] = np.inf
+    fechas = pd.Series(pd.date_range('2024-01-01', periods=rows, freq='h'))
+    fechas[rng.random(rows) < 0.1] = pd.NaT
+    return pd.DataFrame({
+        'POLIZA': [f"P{i:07d}" for i in range(rows)],
+        'REGIONAL': rng.choice(['BOGOTA', 'MEDELLIN', 'CALI', None], rows),
+        'PRIMA': prima,
+        'MES': rng.integers(1, 13, rows),
+        'FECHA': fechas,
+    })
+
+def _old_cell_loop(df):
+    # Antes: renovaciones / cancelaciones
+    data = []
+    for record in df.to_dict(orient='records'):
+        clean = {}
+        for k, v in record.items():
+            if pd.isna(v) or (isinstance(v, float) and math.isinf(v)):
+                clean[k] = None
+            elif isinstance(v, (pd.Timestamp, datetime)):
+                clean[k] = v.isoformat()
+            else:
+                clean[k] = v
+        data.append(clean)
+    return data
+
+def _old_replace_pipeline(df):
+    # Antes: hojas genéricas (mock_sheets)
+    df = df.replace([np.nan, np.inf, -np.inf], None)
+    for col in df.select_dtypes(include=['datetime64']).columns:
+        df[col] = df[col].dt.strftime('%Y-%m-%d')
+    df = df.fillna("").infer_objects()
+    return df.to_dict(orient='records')
+
+def _old_forecast_sanitize(records):
+    # Antes: forecast-calculated recorría cada valor por request
+    for row in records:
+        for k, v in row.items():
+            if isinstance(v, float) and (math.isnan(v) or math.isinf(v)):
+                row[k] = None
+    return records
+
+def _time_ms(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    df = _frame(rows)
+    records = df.to_dict(orient='records')
+    print(f"Filas: {rows}")
+    print(f"{'Ruta':40} {'ms':>10}")
+    print(f"{'loop por celda (por request)':40} {_time_ms(lambda: _old_cell_loop(df)):10.1f}")
+    print(f"{'replace/fillna/infer (por request)':40} {_time_ms(lambda: _old_replace_pipeline(df)):10.1f}")
+    print(f"{'sanitize forecast (por request)':40} {_time_ms(lambda: _old_forecast_sanitize(records)):10.1f}")
+    print(f"{'canonical_records (una vez)':40} {_time_ms(lambda: canonical_records(df)):10.1f}")
+    print(f"{'canonical_records (vista, YYYY-MM-DD)':40} {_time_ms(lambda: canonical_records(df, null='', date_format=ISO_DATE)):10.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark de serialización y bytes transferidos para los endpoints más pesados.
+Compara la ruta por defecto de FastAPI (jsonable_encoder + json.dumps) con
+fast_json.dumps (orjson si está instalado) y mide el tamaño con gzip / brotli.
+
+Uso (desde server/):  python tools/benchmark_payloads.py [repeticiones]
+"""
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+
+from services import fast_json
+from services.compression import BROTLI_QUALITY, GZIP_LEVEL, brotli
+from services.unified_data_processor import load_unified_cache, get_all_records_paginated
+from services.cobros_index import get_cobros_summary
+from services.cancelaciones_service import get_cancelaciones_data
+from services.renewals_service import load_renewals_data
+
+def _payloads():
+    todos = load_unified_cache().get('todos', [])
+    renewals = load_renewals_data() or []
+    month = max((r.get('# MES') for r in renewals if isinstance(r.get('# MES'), int)), default=None)
+    page = get_all_records_paginated(1, 100)
+    return {
+        '/api/reporte/all?page=1 (100 filas)': {"success": True, "data": page['data'],
+                                                "pagination": {k: page[k] for k in ('page', 'page_size', 'total', 'total_pages')}},
+        'todos completo (snapshot sin paginar)': {"success": True, "data": todos},
+        '/api/cobros/pending': {"success": True, **get_cobros_summary()},
+        '/api/cancelaciones': {"success": True, "data": get_cancelaciones_data()},
+        f'/api/renewals/{month}': {"success": True, "data": [r for r in renewals if r.get('# MES') == month]},
+    }
+
+def _time_ms(fn, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best, result
+
+def _default_fastapi(payload):
+    return json.dumps(jsonable_encoder(payload), ensure_ascii=False, allow_nan=True).encode('utf-8')
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"Encoder rápido: {'orjson' if fast_json.orjson else 'json (stdlib, orjson no instalado)'}")
+    print(f"Brotli: {'disponible' if brotli else 'no instalado'}\n")
+
+    header = f"{'endpoint':<40}{'default ms':>12}{'fast ms':>10}{'x':>7}{'raw KB':>10}{'gzip KB':>10}{'br KB':>9}{'gz ms':>8}{'br ms':>8}"
+    print(header)
+    print('-' * len(header))
+    for name, payload in _payloads().items():
+        default_ms, _ = _time_ms(lambda: _default_fastapi(payload), repeat)
+        fast_ms, body = _time_ms(lambda: fast_json.dumps(payload), repeat)
+        gz_ms, gz = _time_ms(lambda: gzip.compress(body, GZIP_LEVEL), repeat)
+        if brotli:
+            br_ms, br = _time_ms(lambda: brotli.compress(body, quality=BROTLI_QUALITY), repeat)
+            br_kb, br_ms_txt = f"{len(br) / 1024:.1f}", f"{br_ms:.1f}"
+        else:
+            br_kb = br_ms_txt = '-'
+        speedup = default_ms / fast_ms if fast_ms else 0
+        print(f"{name:<40}{default_ms:>12.1f}{fast_ms:>10.1f}{speedup:>7.1f}"
+              f"{len(body) / 1024:>10.1f}{len(gz) / 1024:>10.1f}{br_kb:>9}{gz_ms:>8.1f}{br_ms_txt:>8}")
+
+if __name__ == "__main__":
+    main()
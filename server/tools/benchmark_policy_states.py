@@ -0,0 +1,80 @@
+"""
+Benchmark del almacén de estados de pólizas a N estados (por defecto 100k).
+Compara el esquema anterior (policy_states.json reescrito completo en cada guardado)
+con PolicyStateManager sobre SQLite WAL + dict en memoria: guardados/s, latencia de
+lectura y tiempo de arranque (migración y carga). Usa un directorio temporal.
+
+Uso (desde server/):  python tools/benchmark_policy_states.py [estados] [guardados]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.policy_state_manager import PolicyStateManager
+
+def _states(n):
+    now = datetime.now().isoformat()
+    return {str(7000000 + i): {"estado": "RECAUDADA" if i % 3 else "PENDIENTE", "fecha": now, "usuario": "Bench"}
+            for i in range(n)}
+
+def _json_save(path, consecutivo):
+    # Esquema anterior: leer todo, cambiar una clave, reescribir con indent=2
+    with open(path, 'r', encoding='utf-8') as f:
+        states = json.load(f)
+    states[consecutivo] = {"estado": "ANULADA", "fecha": datetime.now().isoformat(), "usuario": "Bench"}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(states, f, ensure_ascii=False, indent=2)
+
+def _rate(label, count, seconds):
+    print(f"{label:42} {count / seconds:12.0f} /s   ({seconds * 1000 / count:.3f} ms c/u)")
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    saves = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    states = _states(n)
+    keys = list(states)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = Path(tmp) / "policy_states.json"
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(states, f, ensure_ascii=False, indent=2)
+        print(f"Estados: {n}  (JSON {json_path.stat().st_size / 1e6:.1f} MB)")
+
+        json_saves = 5
+        start = time.perf_counter()
+        for i in range(json_saves):
+            _json_save(json_path, keys[i])
+        _rate("JSON: guardar (reescritura completa)", json_saves, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        manager = PolicyStateManager(json_path)
+        print(f"{'SQLite: migración + carga inicial':42} {(time.perf_counter() - start) * 1000:12.1f} ms")
+
+        start = time.perf_counter()
+        PolicyStateManager(json_path)
+        print(f"{'SQLite: arranque (carga desde la base)':42} {(time.perf_counter() - start) * 1000:12.1f} ms")
+
+        start = time.perf_counter()
+        for i in range(saves):
+            manager.save_state(keys[i % n], "ANULADA", "Bench")
+        _rate("SQLite: save_state", saves, time.perf_counter() - start)
+
+        reads = 100000
+        start = time.perf_counter()
+        for i in range(reads):
+            manager.get_state(keys[(i * 7919) % n])
+        _rate("SQLite: get_state", reads, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            manager.get_all_states()
+        _rate("SQLite: get_all_states", 1000, time.perf_counter() - start)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Prueba de concurrencia de los almacenes de ediciones del usuario.
+Varios hilos llaman a los almacenes a la vez, como el threadpool de FastAPI cuando
+varios usuarios guardan en los endpoints (sync) de metas, primas, cancelaciones y
+estados de pólizas; no pasa por HTTP. Al final se verifica que
+ninguna edición se perdió, releyendo desde disco. Compara con el esquema anterior
+(leer JSON completo, modificar, reescribir) y muestra escrituras/s.
+
+Uso (desde server/):  python tools/stress_json_stores.py [hilos] [ediciones_por_hilo]
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.journal_store import JournalStore
+from services.policy_state_manager import PolicyStateManager
+
+def _run_threads(threads, edits, work):
+    errors = []
+
+    def worker(t):
+        try:
+            for i in range(edits):
+                work(t, i)
+        except Exception as e:
+            errors.append(e)
+
+    pool = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    start = time.perf_counter()
+    for th in pool:
+        th.start()
+    for th in pool:
+        th.join()
+    elapsed = time.perf_counter() - start
+    if errors:
+        print(f"  errores: {len(errors)} (ej: {errors[0]})")
+    return elapsed
+
+def _legacy(tmp, threads, edits):
+    path = os.path.join(tmp, 'legacy.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({}, f)
+
+    def work(t, i):
+        # Esquema anterior: leer todo, modificar una clave, reescribir (sin lock)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except json.JSONDecodeError:
+            data = {}
+        data[f"{t}:{i}"] = i
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    elapsed = _run_threads(threads, edits, work)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            saved = len(json.load(f))
+    except json.JSONDecodeError:
+        saved = 0
+    return elapsed, saved
+
+def _journal(tmp, threads, edits):
+    path = os.path.join(tmp, 'store.json')
+    store = JournalStore(path)
+    stop = threading.Event()
+
+    def compactor():
+        while not stop.is_set():
+            store.compact()
+            time.sleep(0.05)
+
+    def work(t, i):
+        store.set(f"{t}:{i}", i)
+        store.update('contador', lambda v: (v or 0) + 1)
+
+    comp = threading.Thread(target=compactor)
+    comp.start()
+    elapsed = _run_threads(threads, edits, work)
+    stop.set()
+    comp.join()
+
+    reloaded = JournalStore(path)
+    keys = sum(1 for k in reloaded.all() if k != 'contador')
+    return elapsed, keys, reloaded.get('contador'), store.stats
+
+def _policy_states(tmp, threads, edits):
+    manager = PolicyStateManager(os.path.join(tmp, 'policy_states.json'))
+
+    def work(t, i):
+        manager.save_state(f"{t}-{i}", 'RECAUDADA', f"hilo {t}")
+
+    elapsed = _run_threads(threads, edits, work)
+    reloaded = PolicyStateManager(os.path.join(tmp, 'policy_states.json'))
+    return elapsed, len(reloaded.get_all_states())
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    edits = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    expected = threads * edits
+    ok = True
+    print(f"Hilos: {threads}  ediciones por hilo: {edits}  total: {expected}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        elapsed, saved = _legacy(tmp, threads, min(edits, 50))
+        legacy_expected = threads * min(edits, 50)
+        print(f"JSON completo (anterior): {legacy_expected / elapsed:9.0f} escrituras/s   "
+              f"guardadas {saved}/{legacy_expected}  perdidas {legacy_expected - saved}")
+
+        elapsed, keys, counter, stats = _journal(tmp, threads, edits)
+        writes = expected * 2
+        batch = stats['records'] / max(stats['batches'], 1)
+        print(f"JournalStore:             {writes / elapsed:9.0f} escrituras/s   "
+              f"claves {keys}/{expected}  contador {counter}/{expected}  "
+              f"registros por fsync {batch:.1f}")
+        ok &= keys == expected and counter == expected
+
+        elapsed, saved = _policy_states(tmp, threads, edits)
+        print(f"PolicyStateManager:       {expected / elapsed:9.0f} escrituras/s   guardadas {saved}/{expected}")
+        ok &= saved == expected
+
+    print("OK: ninguna edición perdida" if ok else "FALLO: se perdieron ediciones")
+    sys.exit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()